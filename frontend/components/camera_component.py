@@ -5,28 +5,60 @@ Camera and document capture module with TrOCR integration
 
 import cv2
 import os
-import uuid
+import sys
+import ctypes
 import asyncio
 import sqlite3
 import json
+import functools
 import logging
-import shutil
+import struct
+import time
+import random
+import itertools
+import threading
+import io
+import queue
+import tempfile
 from datetime import datetime
 from dataclasses import dataclass, asdict
 from enum import Enum
-from typing import Optional, List, Callable
-from PIL import Image, ImageEnhance, ImageOps
+from typing import Optional, List, Callable, Union
+from PIL import Image, ImageEnhance, ImageOps, ImageStat
 import numpy as np
 from pathlib import Path
 
-# TrOCR imports
+# TrOCR imports (torch/transformers are heavy, so they load on first OCR use)
+TROCR_AVAILABLE = None  # Resolved by _trocr_available()
+torch = None
+TrOCRProcessor = None
+VisionEncoderDecoderModel = None
+
+
+def _trocr_available() -> bool:
+    """Import TrOCR dependencies on first call and report whether they are installed"""
+    global TROCR_AVAILABLE, torch, TrOCRProcessor, VisionEncoderDecoderModel
+    if TROCR_AVAILABLE is None:
+        try:
+            import torch as _torch
+            from transformers import TrOCRProcessor as _TrOCRProcessor
+            from transformers import VisionEncoderDecoderModel as _VisionEncoderDecoderModel
+        except ImportError:
+            TROCR_AVAILABLE = False
+            print("Warning: TrOCR not available. Install with: pip install transformers torch")
+        else:
+            torch = _torch
+            TrOCRProcessor = _TrOCRProcessor
+            VisionEncoderDecoderModel = _VisionEncoderDecoderModel
+            TROCR_AVAILABLE = True
+    return TROCR_AVAILABLE
+
+# Optional JIT acceleration for pixel kernels
 try:
-    from transformers import TrOCRProcessor, VisionEncoderDecoderModel
-    import torch
-    TROCR_AVAILABLE = True
+    from numba import njit, prange, config as _numba_config
+    NUMBA_AVAILABLE = True
 except ImportError:
-    TROCR_AVAILABLE = False
-    print("Warning: TrOCR not available. Install with: pip install transformers torch")
+    NUMBA_AVAILABLE = False
 
 
 class DocumentType(Enum):
@@ -74,6 +106,12 @@ class CameraConfig:
     max_image_size: tuple = (1920, 1080)
     image_format: str = "PNG"
     compression_quality: int = 85
+    optimize_encoding: bool = False  # Extra Huffman/deflate pass: smaller files, ~2x slower saves
+    batch_size: int = 8  # Max images per TrOCR generate call in batch OCR
+    trocr_dtype: str = "auto"  # auto (bf16/fp16 on GPU, int8 on CPU), float32, bfloat16, float16, int8
+    strict_validation: bool = False  # Parse JPEG/PNG structure (and PIL verify() on failure) on import
+    prefetch_frames: bool = False  # Open the camera at startup and keep the newest frame ready (camera stays on until cleanup())
+    warmup_ocr: bool = False  # Load TrOCR in the background at startup (imports torch, may download the model)
     auto_enhance: bool = True
     create_backup: bool = True
 
@@ -99,14 +137,306 @@ class ImageProcessingError(CameraError):
     pass
 
 
+def _stat(path) -> Optional[os.stat_result]:
+    """Single stat call that returns None for missing files"""
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+def _drop_page_cache(path) -> None:
+    """Hint the kernel to evict a finished file from the page cache (best effort, POSIX only)"""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+# linux/falloc.h
+_FALLOC_FL_KEEP_SIZE = 0x01
+_FALLOC_FL_PUNCH_HOLE = 0x02
+_OVERWRITE_CHUNK = 4 << 20
+
+
+@functools.lru_cache(maxsize=None)
+def _libc_function(name: str, *argtypes):
+    """int-returning libc function via ctypes, or None off Linux / when the symbol is missing"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        function = getattr(ctypes.CDLL(None, use_errno=True), name)
+    except (OSError, AttributeError):
+        return None
+    function.argtypes = list(argtypes)
+    function.restype = ctypes.c_int
+    return function
+
+
+def _punch_hole(fd: int, size: int) -> bool:
+    """Deallocate a file's blocks in place without writing any data; False if unsupported"""
+    fallocate = _libc_function('fallocate', ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64)
+    if fallocate is None or size == 0:
+        return False
+    return fallocate(fd, _FALLOC_FL_PUNCH_HOLE | _FALLOC_FL_KEEP_SIZE, 0, size) == 0
+
+
+def _syncfs(path) -> bool:
+    """Flush every dirty page of the filesystem holding path in one call; False if unsupported"""
+    syncfs = _libc_function('syncfs', ctypes.c_int)
+    if syncfs is None:
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return syncfs(fd) == 0
+    finally:
+        os.close(fd)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """os.write until every byte is written"""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _write_private(path, data: bytes) -> None:
+    """Atomically create an owner-only file: it appears at path complete or not at all"""
+    directory = os.path.dirname(os.path.abspath(path))
+    
+    # Linux: write an unnamed inode, then give it its final name in one linkat
+    if hasattr(os, 'O_TMPFILE'):
+        try:
+            fd = os.open(directory, os.O_TMPFILE | os.O_WRONLY, 0o600)
+        except OSError:
+            pass  # Filesystem without O_TMPFILE support
+        else:
+            try:
+                _write_all(fd, data)
+                os.link(f"/proc/self/fd/{fd}", path)
+                return
+            except OSError:
+                pass  # No /proc or the name exists; fall through to rename
+            finally:
+                os.close(fd)
+    
+    # Portable: named temp file in the same directory (mkstemp uses 0o600), then rename over path
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+@functools.lru_cache(maxsize=1)
+def _cuda_resize_available() -> bool:
+    """True when OpenCV was built with CUDA and a device is present"""
+    try:
+        return cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except (AttributeError, cv2.error):
+        return False
+
+
+# Per-thread GPU buffers and stream, reused while frame sizes stay the same
+_cuda_state = threading.local()
+
+
+def _resize_cuda(frame: np.ndarray, new_size: tuple) -> np.ndarray:
+    """cv2.resize on the GPU: upload, INTER_AREA downscale and download on one stream"""
+    if not hasattr(_cuda_state, 'stream'):
+        _cuda_state.stream = cv2.cuda_Stream()
+        _cuda_state.src = cv2.cuda_GpuMat()
+        _cuda_state.dst = cv2.cuda_GpuMat()
+    stream = _cuda_state.stream
+    _cuda_state.src.upload(frame, stream)
+    cv2.cuda.resize(_cuda_state.src, new_size, _cuda_state.dst,
+                    interpolation=cv2.INTER_AREA, stream=stream)
+    result = _cuda_state.dst.download(stream)
+    stream.waitForCompletion()
+    return result
+
+
+@functools.lru_cache(maxsize=128)
+def _ensure_dir(path: str) -> str:
+    """Create an owner-only directory once per process; later calls are a cache hit, not a mkdir"""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+@functools.lru_cache(maxsize=64)
+def _fit_size(width: int, height: int, max_size: tuple) -> Optional[tuple]:
+    """Target (width, height) that fits max_size keeping aspect ratio, or None if it already fits"""
+    scale = min(max_size[0] / width, max_size[1] / height)
+    if scale >= 1:
+        return None
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+# The workqueue threading layer does not support concurrent parallel launches
+_NUMBA_KERNEL_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _configure_numba_threading() -> None:
+    """Prefer OpenMP/workqueue over TBB before the first parallel launch, unless the app chose a layer
+    
+    The kernels run on executor threads, and numba's TBB layer hangs interpreter exit after a
+    parallel launch from a non-main thread. The layer is fixed at numba's first launch, so this
+    only takes effect when it runs before any other parallel numba code in the process.
+    """
+    if 'NUMBA_THREADING_LAYER_PRIORITY' not in os.environ:
+        _numba_config.THREADING_LAYER_PRIORITY = ['omp', 'workqueue', 'tbb']
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, boundscheck=False, cache=True)
+    def _enhance_kernel(src, dst, lut, sharpness):
+        """Fused contrast LUT + 3x3 smooth-based sharpen, matching ImageEnhance semantics"""
+        h, w, channels = src.shape
+        for y in prange(h):
+            for x in range(w):
+                for k in range(channels):
+                    c = lut[src[y, x, k]]
+                    # PIL's 3x3 filter leaves the outer border untouched
+                    if y == 0 or y == h - 1 or x == 0 or x == w - 1:
+                        dst[y, x, k] = np.uint8(c)
+                        continue
+                    s = (lut[src[y - 1, x - 1, k]] + lut[src[y - 1, x, k]] + lut[src[y - 1, x + 1, k]]
+                         + lut[src[y, x - 1, k]] + 5.0 * c + lut[src[y, x + 1, k]]
+                         + lut[src[y + 1, x - 1, k]] + lut[src[y + 1, x, k]] + lut[src[y + 1, x + 1, k]])
+                    smooth = np.floor(s / 13.0 + 0.5)
+                    v = smooth + sharpness * (c - smooth)
+                    if v <= 0.0:
+                        dst[y, x, k] = 0
+                    elif v >= 255.0:
+                        dst[y, x, k] = 255
+                    else:
+                        dst[y, x, k] = np.uint8(v)
+    
+    @njit(parallel=True, boundscheck=False, cache=True)
+    def _fill_random_kernel(buf, seed):
+        """Fill a uint64 buffer with splitmix64 output; each index is independent so prange splits freely"""
+        for i in prange(buf.size):
+            z = seed + np.uint64(i + 1) * np.uint64(0x9E3779B97F4A7C15)
+            z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+            z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+            buf[i] = z ^ (z >> np.uint64(31))
+
+
+def _overwrite_random(fd: int, size: int) -> None:
+    """Overwrite an open file from its current position with size random bytes, in bounded chunks"""
+    if not NUMBA_AVAILABLE:
+        remaining = size
+        while remaining > 0:
+            chunk = min(remaining, _OVERWRITE_CHUNK)
+            _write_all(fd, os.urandom(chunk))
+            remaining -= chunk
+        return
+    
+    # Overwrite-then-unlink only needs unpredictable bytes, so a CSPRNG only seeds each chunk
+    buf = np.empty(_OVERWRITE_CHUNK // 8, dtype=np.uint64)
+    data = buf.view(np.uint8)
+    remaining = size
+    while remaining > 0:
+        chunk = min(remaining, _OVERWRITE_CHUNK)
+        with _NUMBA_KERNEL_LOCK:
+            _configure_numba_threading()
+            _fill_random_kernel(buf, np.uint64(int.from_bytes(os.urandom(8), 'little')))
+        _write_all(fd, data[:chunk])
+        remaining -= chunk
+
+
+# Loaded TrOCR models are shared by every ImageProcessor in the process
+_TROCR_LOAD_LOCK = threading.Lock()
+
+
+def _warm_generate(model, image_size: tuple, device: str, batch: int):
+    """One short dummy generate so compilation, autotuning and allocator growth happen up front"""
+    dummy = torch.zeros((batch, 3, *image_size), device=device, dtype=model.dtype)
+    with torch.inference_mode():
+        model.generate(dummy, max_new_tokens=2, num_beams=1)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_trocr(model_name: str, weight_dtype: str, device: str) -> tuple:
+    """Load, cast and warm a TrOCR (processor, model) pair, cached per (name, dtype, device)"""
+    print(f"Loading TrOCR model: {model_name} ({weight_dtype})")
+    processor = TrOCRProcessor.from_pretrained(model_name)
+    
+    if weight_dtype == "int8":
+        # Dynamic int8 Linear layers use VNNI/AVX2 kernels on CPU
+        model = VisionEncoderDecoderModel.from_pretrained(model_name)
+        model.eval()
+        quantization = getattr(torch, "ao", torch).quantization
+        model = quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    else:
+        # Loading straight into half precision avoids materializing fp32 weights
+        model = VisionEncoderDecoderModel.from_pretrained(
+            model_name, torch_dtype=getattr(torch, weight_dtype)
+        )
+        model.eval()
+    model.to(device)
+    
+    size = getattr(processor.image_processor, "size", None) or {}
+    image_size = size.get("height", 384), size.get("width", 384)
+    
+    if device == "cuda":
+        # Spatial size is fixed by the processor; cuDNN autotunes once per batch size
+        torch.backends.cudnn.benchmark = True
+    
+    if device == "cuda" and hasattr(torch, "compile"):
+        eager_encoder = model.encoder
+        try:
+            # Batch size varies (single captures, full and tail batches), so compile it as dynamic.
+            # torch specializes size 1, so warming batches of 1 and 2 covers every later size
+            model.encoder = torch.compile(eager_encoder, dynamic=True)
+            # Compilation is deferred to the first call, so backend failures (e.g. no Triton) surface here
+            for batch in (1, 2):
+                _warm_generate(model, image_size, device, batch)
+        except Exception as e:
+            print(f"torch.compile failed, running eager: {e}")
+            model.encoder = eager_encoder
+            _warm_generate(model, image_size, device, 1)
+    else:
+        _warm_generate(model, image_size, device, 1)
+    
+    return processor, model
+
+
 class DocumentStorage:
     """Handles document storage and database operations"""
     
+    _INSERT_SQL = '''
+        INSERT OR REPLACE INTO documents 
+        (id, file_path, document_type, capture_date, file_size, 
+         image_width, image_height, is_processed, ocr_text, 
+         confidence_score, tags)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
     def __init__(self, storage_path: str):
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(exist_ok=True, mode=0o700)  # Secure permissions
         self.db_path = self.storage_path / "documents.db"
         self.audit_logger = self._setup_audit_logger()
+        self._documents_cache: Optional[tuple] = None  # (data_version, documents)
+        self._write_generation = 0  # Bumped under the lock by every local write
+        self._lock = threading.Lock()
+        # ID source: millisecond-seeded counter + 32 random bits, no syscall per ID
+        self._id_rng = random.Random(os.urandom(16))
+        self._id_counter = itertools.count(int(time.time() * 1000))
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
         self._init_database()
     
     def _setup_audit_logger(self):
@@ -132,8 +462,11 @@ class DocumentStorage:
     
     def _init_database(self):
         """Initialize SQLite database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._conn.cursor()
+        
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA temp_store=MEMORY')
         
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS documents (
@@ -152,40 +485,49 @@ class DocumentStorage:
             )
         ''')
         
-        conn.commit()
-        conn.close()
+        # Covers the type filter and its capture_date ordering, so by-type reads skip the sort
+        cursor.execute('DROP INDEX IF EXISTS idx_doctype')
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS idx_doctype_date ON documents(document_type, capture_date)'
+        )
         
         # Secure database permissions
         os.chmod(self.db_path, 0o600)
     
+    def new_document_id(self) -> str:
+        """Generate a unique, roughly time-ordered document ID"""
+        return f"{next(self._id_counter):013x}{self._id_rng.getrandbits(32):08x}"
+    
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    @staticmethod
+    def _document_to_row(doc: CapturedDocument) -> tuple:
+        """Build the documents table row for a CapturedDocument"""
+        return (
+            doc.id,
+            doc.file_path,
+            doc.document_type.value,
+            doc.capture_date.isoformat(),
+            doc.file_size,
+            doc.image_width,
+            doc.image_height,
+            doc.is_processed,
+            doc.ocr_text,
+            doc.confidence_score,
+            json.dumps(doc.tags) if doc.tags else None
+        )
+    
     def save_document(self, doc: CapturedDocument) -> bool:
         """Save document metadata to database with audit logging"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO documents 
-                (id, file_path, document_type, capture_date, file_size, 
-                 image_width, image_height, is_processed, ocr_text, 
-                 confidence_score, tags)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                doc.id,
-                doc.file_path,
-                doc.document_type.value,
-                doc.capture_date.isoformat(),
-                doc.file_size,
-                doc.image_width,
-                doc.image_height,
-                doc.is_processed,
-                doc.ocr_text,
-                doc.confidence_score,
-                json.dumps(doc.tags) if doc.tags else None
-            ))
-            
-            conn.commit()
-            conn.close()
+            with self._lock:
+                self._conn.execute(self._INSERT_SQL, self._document_to_row(doc))
+                self._invalidate_cache()
             
             # Audit logging
             self.audit_logger.info(f"Document saved: {doc.id} ({doc.document_type.value})")
@@ -195,49 +537,146 @@ class DocumentStorage:
             self.audit_logger.error(f"Failed to save document {doc.id}: {e}")
             raise StorageError(f"Failed to save document: {e}")
     
+    def save_documents(self, docs: List[CapturedDocument]) -> bool:
+        """Save several documents in a single transaction"""
+        if not docs:
+            return True
+        
+        try:
+            rows = [self._document_to_row(doc) for doc in docs]
+            with self._lock:
+                self._conn.execute('BEGIN')
+                try:
+                    self._conn.executemany(self._INSERT_SQL, rows)
+                    self._conn.execute('COMMIT')
+                except Exception:
+                    self._conn.execute('ROLLBACK')
+                    raise
+                self._invalidate_cache()
+            
+            for doc in docs:
+                self.audit_logger.info(f"Document saved: {doc.id} ({doc.document_type.value})")
+            return True
+            
+        except Exception as e:
+            self.audit_logger.error(f"Failed to save {len(docs)} documents: {e}")
+            raise StorageError(f"Failed to save documents: {e}")
+    
+    def _invalidate_cache(self):
+        """Drop cached document list after a write; call with self._lock held"""
+        self._write_generation += 1
+        self._documents_cache = None
+    
+    @staticmethod
+    def _row_to_document(row) -> CapturedDocument:
+        """Build a CapturedDocument from a documents table row"""
+        return CapturedDocument(
+            id=row[0],
+            file_path=row[1],
+            document_type=DocumentType(row[2]),
+            capture_date=datetime.fromisoformat(row[3]),
+            file_size=row[4],
+            image_width=row[5],
+            image_height=row[6],
+            is_processed=bool(row[7]),
+            ocr_text=row[8],
+            confidence_score=row[9],
+            tags=json.loads(row[10]) if row[10] else None
+        )
+    
     def get_all_documents(self) -> List[CapturedDocument]:
-        """Retrieve all documents from database"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT * FROM documents ORDER BY capture_date DESC')
-            rows = cursor.fetchall()
-            conn.close()
-            
-            documents = []
-            for row in rows:
-                doc = CapturedDocument(
-                    id=row[0],
-                    file_path=row[1],
-                    document_type=DocumentType(row[2]),
-                    capture_date=datetime.fromisoformat(row[3]),
-                    file_size=row[4],
-                    image_width=row[5],
-                    image_height=row[6],
-                    is_processed=bool(row[7]),
-                    ocr_text=row[8],
-                    confidence_score=row[9],
-                    tags=json.loads(row[10]) if row[10] else None
-                )
-                documents.append(doc)
+        """Retrieve all documents from database (cached until the next write)"""
+        try:
+            with self._lock:
+                # data_version changes whenever another connection commits
+                version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+                if self._documents_cache is not None and self._documents_cache[0] == version:
+                    return list(self._documents_cache[1])
+                
+                rows = self._conn.execute('SELECT * FROM documents ORDER BY capture_date DESC').fetchall()
+                generation = self._write_generation
             
-            return documents
+            documents = [self._row_to_document(row) for row in rows]
+            
+            # data_version ignores this connection's own commits, so only cache if no local
+            # write landed while the rows were being converted
+            with self._lock:
+                if self._write_generation == generation:
+                    self._documents_cache = (version, documents)
+            
+            return list(documents)
             
         except Exception as e:
             raise StorageError(f"Failed to retrieve documents: {e}")
     
-    def delete_document(self, document_id: str) -> bool:
-        """Delete document from database"""
+    def get_all_as_frame(self, doc_type: Optional[DocumentType] = None) -> dict:
+        """Retrieve document metadata as column arrays for list views (full rows via get_document)"""
+        columns = ('id', 'file_path', 'document_type', 'capture_date', 'file_size',
+                   'image_width', 'image_height', 'is_processed', 'confidence_score')
+        query = f"SELECT {', '.join(columns)} FROM documents"
+        params = ()
+        if doc_type is not None:
+            query += " WHERE document_type = ?"
+            params = (doc_type.value,)
+        query += " ORDER BY capture_date DESC"
+        
+        try:
+            with self._lock:
+                rows = self._conn.execute(query, params).fetchall()
+            
+            values = list(zip(*rows)) if rows else [()] * len(columns)
+            count = len(rows)
+            return {
+                'id': np.array(values[0], dtype=str),
+                'file_path': np.array(values[1], dtype=str),
+                'document_type': np.array(values[2], dtype=str),
+                'capture_date': np.array(values[3], dtype='datetime64[us]'),
+                'file_size': np.fromiter(values[4], dtype=np.int64, count=count),
+                'image_width': np.fromiter(values[5], dtype=np.int32, count=count),
+                'image_height': np.fromiter(values[6], dtype=np.int32, count=count),
+                'is_processed': np.fromiter(values[7], dtype=bool, count=count),
+                'confidence_score': np.fromiter(
+                    (np.nan if v is None else v for v in values[8]), dtype=np.float64, count=count
+                ),
+            }
+            
+        except Exception as e:
+            raise StorageError(f"Failed to retrieve documents: {e}")
+    
+    def get_document(self, document_id: str) -> Optional[CapturedDocument]:
+        """Retrieve a single document by primary key"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self._lock:
+                row = self._conn.execute(
+                    'SELECT * FROM documents WHERE id = ? LIMIT 1', (document_id,)
+                ).fetchone()
             
-            cursor.execute('DELETE FROM documents WHERE id = ?', (document_id,))
-            deleted = cursor.rowcount > 0
+            return self._row_to_document(row) if row else None
             
-            conn.commit()
-            conn.close()
+        except Exception as e:
+            raise StorageError(f"Failed to retrieve document {document_id}: {e}")
+    
+    def get_documents_by_type(self, doc_type: DocumentType) -> List[CapturedDocument]:
+        """Retrieve documents of one type, filtered in SQL"""
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT * FROM documents WHERE document_type = ? ORDER BY capture_date DESC',
+                    (doc_type.value,)
+                ).fetchall()
+            
+            return [self._row_to_document(row) for row in rows]
+            
+        except Exception as e:
+            raise StorageError(f"Failed to retrieve documents: {e}")
+    
+    def delete_document(self, document_id: str) -> bool:
+        """Delete document from database"""
+        try:
+            with self._lock:
+                cursor = self._conn.execute('DELETE FROM documents WHERE id = ?', (document_id,))
+                deleted = cursor.rowcount > 0
+                self._invalidate_cache()
             
             if deleted:
                 self.audit_logger.info(f"Document deleted: {document_id}")
@@ -247,68 +686,162 @@ class DocumentStorage:
         except Exception as e:
             self.audit_logger.error(f"Failed to delete document {document_id}: {e}")
             raise StorageError(f"Failed to delete document: {e}")
+    
+    def pop_document(self, document_id: str) -> Optional[str]:
+        """Delete a document row and return its file path in one transaction (None if missing)"""
+        return self.pop_documents([document_id]).get(document_id)
+    
+    def pop_documents(self, document_ids: List[str]) -> dict:
+        """Delete document rows in one transaction; returns {id: file_path} for the rows that existed"""
+        if not document_ids:
+            return {}
+        
+        ids = list(dict.fromkeys(document_ids))
+        try:
+            popped = {}
+            with self._lock:
+                # IMMEDIATE takes the write lock up front so the lookup and delete can't interleave
+                self._conn.execute('BEGIN IMMEDIATE')
+                try:
+                    # Stay under SQLite's bound-parameter limit
+                    for start in range(0, len(ids), 500):
+                        chunk = ids[start:start + 500]
+                        placeholders = ', '.join('?' * len(chunk))
+                        popped.update(self._conn.execute(
+                            f'SELECT id, file_path FROM documents WHERE id IN ({placeholders})', chunk
+                        ).fetchall())
+                        self._conn.execute(f'DELETE FROM documents WHERE id IN ({placeholders})', chunk)
+                    self._conn.execute('COMMIT')
+                except Exception:
+                    self._conn.execute('ROLLBACK')
+                    raise
+                
+                if popped:
+                    self._invalidate_cache()
+            
+            for document_id in popped:
+                self.audit_logger.info(f"Document deleted: {document_id}")
+            return popped
+            
+        except Exception as e:
+            self.audit_logger.error(f"Failed to delete {len(ids)} documents: {e}")
+            raise StorageError(f"Failed to delete documents: {e}")
 
 
 class ImageProcessor:
     """Handles image processing and TrOCR integration"""
     
-    def __init__(self):
+    TROCR_DTYPES = ('auto', 'float32', 'bfloat16', 'float16', 'int8')
+    
+    def __init__(self, trocr_dtype: str = "auto"):
         """Initialize TrOCR models"""
         self.trocr_handwritten = None
         self.trocr_printed = None
         self.trocr_processor = None
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu") if TROCR_AVAILABLE else None
-        
-        if TROCR_AVAILABLE:
-            print(f"TrOCR will use device: {self.device}")
-        else:
-            print("TrOCR not available - OCR functionality disabled")
+        self.trocr_dtype = trocr_dtype
+        self.device = None  # Chosen when the first model loads
     
     def _load_trocr_model(self, model_name: str):
-        """Load TrOCR model on demand"""
-        if not TROCR_AVAILABLE:
+        """Load TrOCR model on demand (shared across instances with the same dtype/device)"""
+        if not _trocr_available():
             raise ImportError("TrOCR not available")
         
         try:
-            print(f"Loading TrOCR model: {model_name}")
-            processor = TrOCRProcessor.from_pretrained(model_name)
-            model = VisionEncoderDecoderModel.from_pretrained(model_name)
-            model.to(self.device)
-            return processor, model
+            if self.device is None:
+                self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+                print(f"TrOCR will use device: {self.device}")
+            
+            weight_dtype = self._resolve_weight_dtype()
+            with _TROCR_LOAD_LOCK:
+                return _load_trocr(model_name, weight_dtype, self.device.type)
             
         except Exception as e:
             raise ImageProcessingError(f"Failed to load TrOCR model: {e}")
     
-    def extract_text_with_trocr(self, image_path: str, doc_type: DocumentType) -> tuple[str, float]:
-        """Extract text using TrOCR (optimized for medical documents)"""
+    def _resolve_weight_dtype(self) -> str:
+        """Map the configured TrOCR dtype onto what the current device supports"""
+        dtype = self.trocr_dtype
+        if dtype == "auto":
+            if self.device.type == "cuda":
+                return "bfloat16" if torch.cuda.is_bf16_supported() else "float16"
+            return "int8"
         
-        if not TROCR_AVAILABLE:
+        if self.device.type == "cuda" and dtype == "int8":
+            # Dynamic quantization only has CPU kernels
+            print("int8 TrOCR weights are CPU-only, using float16 on CUDA")
+            return "float16"
+        if self.device.type == "cpu" and dtype == "float16":
+            # fp16 matmuls are slow or unsupported on most CPUs
+            print("float16 TrOCR weights are GPU-only, using float32 on CPU")
+            return "float32"
+        return dtype
+    
+    def warmup(self, doc_type: DocumentType = DocumentType.OTHER) -> bool:
+        """Load and warm the TrOCR model for a document type ahead of the first OCR request"""
+        if not _trocr_available():
+            return False
+        
+        try:
+            self._get_trocr_model(doc_type)
+            return True
+        except ImageProcessingError as e:
+            print(f"TrOCR warmup failed: {e}")
+            return False
+    
+    def _get_trocr_model(self, doc_type: DocumentType):
+        """Return (processor, model) for the document type, loading on first use"""
+        if doc_type == DocumentType.PRESCRIPTION:
+            # Prescriptions are often handwritten
+            if not self.trocr_handwritten:
+                self.trocr_processor, self.trocr_handwritten = self._load_trocr_model(
+                    'microsoft/trocr-base-handwritten'
+                )
+            return self.trocr_processor, self.trocr_handwritten
+        
+        # Lab reports, insurance cards are usually printed
+        if not self.trocr_printed:
+            self.trocr_processor, self.trocr_printed = self._load_trocr_model(
+                'microsoft/trocr-base-printed'
+            )
+        return self.trocr_processor, self.trocr_printed
+    
+    def _generate_texts(self, images: List[Image.Image], doc_type: DocumentType) -> List[str]:
+        """Run one batched TrOCR generate call over RGB images"""
+        processor, model = self._get_trocr_model(doc_type)
+        
+        pixel_values = processor(images, return_tensors="pt").pixel_values.to(
+            self.device, dtype=model.dtype
+        )
+        
+        # Rows that already emitted EOS are not pruned from the decoder: generate keeps a
+        # per-row KV cache, so running a row subset would desync it. Batches are small
+        # (CameraConfig.batch_size) and generate stops as soon as every row has finished.
+        with torch.inference_mode():
+            generated_ids = model.generate(pixel_values, num_beams=1, use_cache=True)
+        
+        return processor.batch_decode(generated_ids, skip_special_tokens=True)
+    
+    @staticmethod
+    def _to_rgb_image(src: Union[str, np.ndarray]) -> Image.Image:
+        """RGB PIL image from a file path or an in-memory OpenCV (BGR) array"""
+        if isinstance(src, np.ndarray):
+            if src.ndim == 2:
+                return Image.fromarray(src).convert('RGB')
+            return Image.fromarray(cv2.cvtColor(src, cv2.COLOR_BGR2RGB))
+        return Image.open(src).convert('RGB')
+    
+    def extract_text_with_trocr(self, image: Union[str, np.ndarray], doc_type: DocumentType) -> tuple[str, float]:
+        """Extract text using TrOCR (optimized for medical documents) from a path or BGR array"""
+        
+        if not _trocr_available():
             return "", 0.0
         
         try:
-            # Choose model based on document type
-            if doc_type == DocumentType.PRESCRIPTION:
-                # Prescriptions are often handwritten
-                if not self.trocr_handwritten:
-                    self.trocr_processor, self.trocr_handwritten = self._load_trocr_model(
-                        'microsoft/trocr-base-handwritten'
-                    )
-                processor, model = self.trocr_processor, self.trocr_handwritten
-            else:
-                # Lab reports, insurance cards are usually printed
-                if not self.trocr_printed:
-                    self.trocr_processor, self.trocr_printed = self._load_trocr_model(
-                        'microsoft/trocr-base-printed'
-                    )
-                processor, model = self.trocr_processor, self.trocr_printed
-            
             # Load and preprocess image
-            image = Image.open(image_path).convert('RGB')
-            pixel_values = processor(image, return_tensors="pt").pixel_values.to(self.device)
+            image = self._to_rgb_image(image)
             
             # Generate text
-            generated_ids = model.generate(pixel_values)
-            generated_text = processor.batch_decode(generated_ids, skip_special_tokens=True)[0]
+            generated_text = self._generate_texts([image], doc_type)[0]
             
             # Estimate confidence score
             confidence = self._estimate_trocr_confidence(generated_text)
@@ -319,6 +852,26 @@ class ImageProcessor:
             print(f"TrOCR processing failed: {e}")
             raise ImageProcessingError(f"TrOCR processing failed: {e}")
     
+    def extract_text_batch(self, image_paths: List[Union[str, np.ndarray]],
+                           doc_type: DocumentType) -> List[tuple[str, float]]:
+        """Extract text from several images of the same type in one TrOCR call"""
+        
+        if not _trocr_available():
+            return [("", 0.0) for _ in image_paths]
+        
+        if not image_paths:
+            return []
+        
+        try:
+            images = [self._to_rgb_image(path) for path in image_paths]
+            texts = self._generate_texts(images, doc_type)
+            
+            return [(text.strip(), self._estimate_trocr_confidence(text)) for text in texts]
+            
+        except Exception as e:
+            print(f"TrOCR batch processing failed: {e}")
+            raise ImageProcessingError(f"TrOCR processing failed: {e}")
+    
     def _estimate_trocr_confidence(self, text: str) -> float:
         """Estimate confidence for TrOCR output"""
         if not text or len(text) < 3:
@@ -343,42 +896,62 @@ class ImageProcessor:
         return min(confidence, 1.0)
     
     @staticmethod
-    def enhance_for_ocr(image_path: str, output_path: str) -> str:
-        """Optimize image for OCR processing"""
+    def enhance_for_ocr(src: Union[str, Image.Image], output_path: str, optimize: bool = False) -> str:
+        """Optimize image (path or already-decoded Image) for OCR processing"""
         try:
-            image = Image.open(image_path)
+            image = src if isinstance(src, Image.Image) else Image.open(src)
             
             # Convert to RGB for consistency
             if image.mode != 'RGB':
                 image = image.convert('RGB')
             
-            # Enhance contrast
-            enhancer = ImageEnhance.Contrast(image)
-            image = enhancer.enhance(1.2)
-            
-            # Enhance sharpness
-            enhancer = ImageEnhance.Sharpness(image)
-            image = enhancer.enhance(1.1)
+            if NUMBA_AVAILABLE:
+                # Contrast + sharpness in a single pass over the pixels
+                mean = int(ImageStat.Stat(image.convert('L')).mean[0] + 0.5)
+                lut = np.floor(np.clip(mean + 1.2 * (np.arange(256) - mean), 0, 255)).astype(np.float32)
+                src = np.asarray(image)
+                dst = np.empty_like(src)
+                with _NUMBA_KERNEL_LOCK:
+                    _configure_numba_threading()
+                    _enhance_kernel(src, dst, lut, 1.1)
+                image = Image.fromarray(dst)
+            else:
+                # Enhance contrast
+                enhancer = ImageEnhance.Contrast(image)
+                image = enhancer.enhance(1.2)
+                
+                # Enhance sharpness
+                enhancer = ImageEnhance.Sharpness(image)
+                image = enhancer.enhance(1.1)
             
             # Save optimized image
-            image.save(output_path, optimize=True, quality=95)
+            image.save(output_path, optimize=optimize, quality=95)
             return output_path
             
         except Exception as e:
             raise ImageProcessingError(f"Failed to process image: {e}")
     
     @staticmethod
-    def resize_image(image_path: str, max_size: tuple) -> str:
-        """Resize image if too large"""
+    def resize_image(src: Union[str, Image.Image], max_size: tuple, optimize: bool = False) -> Image.Image:
+        """Resize image if too large; a path is resized in place, an Image is returned resized"""
         try:
-            image = Image.open(image_path)
+            from_path = not isinstance(src, Image.Image)
+            image = Image.open(src) if from_path else src
             
-            if image.size[0] <= max_size[0] and image.size[1] <= max_size[1]:
-                return image_path
+            new_size = _fit_size(image.size[0], image.size[1], tuple(max_size))
+            if new_size is None:
+                return image
             
-            image.thumbnail(max_size, Image.Resampling.LANCZOS)
-            image.save(image_path, optimize=True)
-            return image_path
+            # Let libjpeg decode at a reduced 1/2, 1/4 or 1/8 scale; Lanczos handles the rest
+            if from_path and image.format == 'JPEG':
+                image.draft(image.mode, max_size)
+            
+            image = image.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+            
+            # Only re-encode files whose pixels actually changed
+            if from_path:
+                image.save(src, optimize=optimize)
+            return image
             
         except Exception as e:
             raise ImageProcessingError(f"Failed to resize image: {e}")
@@ -389,9 +962,8 @@ class ImageProcessor:
         try:
             image = Image.open(image_path)
             
-            # Create clean image without EXIF
-            clean_image = Image.new(image.mode, image.size)
-            clean_image.putdata(list(image.getdata()))
+            # Create clean image without EXIF (raw pixel buffer copy, no per-pixel objects)
+            clean_image = Image.frombytes(image.mode, image.size, image.tobytes())
             
             # Save without metadata
             clean_image.save(image_path)
@@ -401,32 +973,180 @@ class ImageProcessor:
         except Exception as e:
             raise ImageProcessingError(f"Failed to strip metadata: {e}")
     
+    @staticmethod
+    def resize_array(frame: np.ndarray, max_size: Optional[tuple]) -> np.ndarray:
+        """Downscale a decoded OpenCV frame in memory to fit max_size"""
+        if not max_size:
+            return frame
+        
+        height, width = frame.shape[:2]
+        new_size = _fit_size(width, height, tuple(max_size))
+        if new_size is None:
+            return frame
+        
+        if _cuda_resize_available():
+            try:
+                return _resize_cuda(frame, new_size)
+            except cv2.error as e:
+                print(f"CUDA resize failed, using CPU: {e}")
+        return cv2.resize(frame, new_size, interpolation=cv2.INTER_AREA)
+    
+    @staticmethod
+    def encode_without_metadata(frame: np.ndarray, image_format: str, params: List[int]) -> bytes:
+        """Encode a frame to image bytes; OpenCV writes pixel data only, so no EXIF/GPS is emitted"""
+        ok, buffer = cv2.imencode(f".{image_format.lower()}", frame, params)
+        if not ok:
+            raise ImageProcessingError(f"Failed to encode image as {image_format}")
+        return buffer.tobytes()
+    
+    @staticmethod
+    def _parse_image_dimensions(header: bytes) -> Optional[tuple]:
+        """Read (width, height) from an image header without decoding, or None if unparseable"""
+        if header.startswith(b'\x89PNG\r\n\x1a\n'):
+            # First chunk must be a 13-byte IHDR
+            if len(header) < 24 or header[8:16] != b'\x00\x00\x00\rIHDR':
+                return None
+            return struct.unpack('>II', header[16:24])
+        
+        if header.startswith((b'GIF87a', b'GIF89a')):
+            if len(header) < 10:
+                return None
+            return struct.unpack('<HH', header[6:10])
+        
+        if header.startswith(b'\xFF\xD8'):
+            # Walk marker segments until the first start-of-frame
+            i = 2
+            while i + 4 <= len(header):
+                if header[i] != 0xFF:
+                    return None
+                marker = header[i + 1]
+                if marker == 0xFF:
+                    i += 1
+                    continue
+                if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+                    i += 2
+                    continue
+                if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                    if i + 9 > len(header):
+                        return None
+                    height, width = struct.unpack('>HH', header[i + 5:i + 9])
+                    return width, height
+                i += 2 + struct.unpack('>H', header[i + 2:i + 4])[0]
+            return None
+        
+        return None
+    
+    @staticmethod
+    def decode_for_size(src: Union[str, bytes, bytearray, memoryview], max_size: Optional[tuple]) -> tuple:
+        """Decode an image (path or file bytes) that will be resized to max_size
+        
+        Returns (BGR array or None, width, height). Dimensions come from the header, so a JPEG much
+        larger than max_size is decoded by libjpeg at 1/2, 1/4 or 1/8 scale straight from the DCT
+        blocks instead of at full resolution.
+        """
+        if isinstance(src, (bytes, bytearray, memoryview)):
+            raw = src
+        else:
+            with open(src, 'rb') as f:
+                raw = f.read()
+        header = bytes(raw[:1 << 18])  # A memoryview slice has no startswith
+        dimensions = ImageProcessor._parse_image_dimensions(header)
+        
+        flags = cv2.IMREAD_COLOR
+        if dimensions and max_size and header.startswith(b'\xFF\xD8'):
+            # EXIF orientation may swap the axes after decode, so both layouts must still fit
+            width, height = dimensions
+            fit, fit_rotated = _fit_size(width, height, tuple(max_size)), _fit_size(height, width, tuple(max_size))
+            if fit and fit_rotated:
+                needed_width, needed_height = max(fit[0], fit_rotated[1]), max(fit[1], fit_rotated[0])
+                for factor, reduced in ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                                        (2, cv2.IMREAD_REDUCED_COLOR_2)):
+                    if width // factor >= needed_width and height // factor >= needed_height:
+                        flags = reduced
+                        break
+        
+        image = cv2.imdecode(np.frombuffer(raw, np.uint8), flags)
+        if image is None:
+            return None, 0, 0
+        
+        if dimensions is None:
+            height, width = image.shape[:2]
+            return image, width, height
+        
+        width, height = dimensions
+        if (image.shape[1] > image.shape[0]) != (width > height):
+            # Report the size as oriented by imread's EXIF rotation
+            width, height = height, width
+        return image, width, height
+    
+    MAX_FILE_SIZE = 50 * 1024 * 1024
+    
+    # Leading bytes of the formats accepted for import
+    IMAGE_SIGNATURES = (
+        b'\xFF\xD8\xFF',  # JPEG
+        b'\x89PNG\r\n\x1a\n',  # PNG
+        b'GIF87a', b'GIF89a',  # GIF
+        b'II*\x00', b'MM\x00*',  # TIFF
+        b'RIFF',  # WebP
+    )
+    
+    @staticmethod
+    def validate_file_safety_fast(src: Union[str, bytes]) -> bool:
+        """Cheap safety check (path or file bytes): size limit, magic bytes and header dimensions only"""
+        try:
+            if isinstance(src, (bytes, bytearray, memoryview)):
+                if len(src) > ImageProcessor.MAX_FILE_SIZE:
+                    return False
+                magic = bytes(src[:16])
+                stream = io.BytesIO(src)
+            else:
+                st = _stat(src)
+                if st is None or st.st_size > ImageProcessor.MAX_FILE_SIZE:
+                    return False
+                with open(src, 'rb') as f:
+                    magic = f.read(16)
+                stream = src
+            
+            if not magic.startswith(ImageProcessor.IMAGE_SIGNATURES):
+                return False
+            
+            # Image.open only parses the header; oversized dimensions raise DecompressionBombError
+            with Image.open(stream) as img:
+                width, height = img.size
+            max_pixels = Image.MAX_IMAGE_PIXELS
+            return width > 0 and height > 0 and not (max_pixels and width * height > max_pixels)
+        except Exception:
+            return False
+    
     @staticmethod
     def validate_file_safety(file_path: str) -> bool:
         """Validate file is safe image"""
         try:
             # Check file size (50MB limit)
-            file_size = os.path.getsize(file_path)
-            if file_size > 50 * 1024 * 1024:
+            st = _stat(file_path)
+            if st is None or st.st_size > ImageProcessor.MAX_FILE_SIZE:
                 return False
             
-            # Check file signature
+            # Check file signature (headers only, bounded read)
             with open(file_path, 'rb') as f:
-                header = f.read(10)
-            
-            image_signatures = [
-                b'\xFF\xD8\xFF',  # JPEG
-                b'\x89PNG\r\n\x1a\n',  # PNG
-                b'GIF87a', b'GIF89a',  # GIF
-                b'RIFF',  # TIFF
-            ]
+                header = f.read(1 << 20)
             
-            if not any(header.startswith(sig) for sig in image_signatures):
+            if not header.startswith(ImageProcessor.IMAGE_SIGNATURES):
                 return False
             
-            # PIL validation
-            with Image.open(file_path) as img:
-                img.verify()
+            dimensions = ImageProcessor._parse_image_dimensions(header)
+            if dimensions is None:
+                # Structure not recognised from the header - fall back to full PIL validation
+                with Image.open(file_path) as img:
+                    img.verify()
+                return True
+            
+            width, height = dimensions
+            if width == 0 or height == 0:
+                return False
+            max_pixels = Image.MAX_IMAGE_PIXELS
+            if max_pixels and width * height > max_pixels:
+                return False
             return True
         except:
             return False
@@ -438,16 +1158,40 @@ class DocumentCamera:
     def __init__(self, config: CameraConfig):
         self.config = self._validate_config(config)
         self.storage = DocumentStorage(config.save_directory)
-        self.image_processor = ImageProcessor()
+        self.image_processor = ImageProcessor(config.trocr_dtype)
         self.progress_callback: Optional[Callable] = None
         self._camera = None
+        self._warmup_future = None
+        self._pending_deletes = set()  # Background secure-delete tasks, kept referenced until done
+        self._frame_thread = None
+        self._latest_frame = queue.Queue(maxsize=1)
+        self._stop_frames = threading.Event()
+        self._frame_error = None
         
         # Ensure directories exist with secure permissions
         Path(config.save_directory).mkdir(exist_ok=True, mode=0o700)
         Path(config.save_directory, "processed").mkdir(exist_ok=True, mode=0o700)
         
+        # Opt-in: inside an event loop, load TrOCR in the background so the first OCR doesn't pay for it
+        if config.warmup_ocr:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+            else:
+                self._warmup_future = loop.run_in_executor(None, self.image_processor.warmup)
+        
+        if config.prefetch_frames:
+            self._frame_thread = threading.Thread(target=self._frame_loop, name="camera-frames", daemon=True)
+            self._frame_thread.start()
+        
         print(f"DocumentCamera initialized. Storage: {config.save_directory}")
     
+    async def warmup(self, doc_type: DocumentType = DocumentType.OTHER) -> bool:
+        """Load and warm the TrOCR model for a document type without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.image_processor.warmup, doc_type)
+    
     def _validate_config(self, config: CameraConfig) -> CameraConfig:
         """Validate configuration settings"""
         save_dir = Path(config.save_directory)
@@ -463,6 +1207,12 @@ class DocumentCamera:
             if w < 100 or h < 100:
                 raise ValueError("Image size too small")
         
+        if config.batch_size < 1:
+            raise ValueError("Batch size must be at least 1")
+        
+        if config.trocr_dtype not in ImageProcessor.TROCR_DTYPES:
+            raise ValueError(f"Invalid TrOCR dtype: {config.trocr_dtype}")
+        
         return config
     
     def _initialize_camera(self):
@@ -483,9 +1233,23 @@ class DocumentCamera:
             
             raise CameraNotAvailableError("No camera available")
     
+    def _imwrite_params(self) -> List[int]:
+        """Encoder parameters for cv2.imwrite based on the configured format"""
+        if self.config.image_format.upper() in ('JPEG', 'JPG'):
+            return [cv2.IMWRITE_JPEG_QUALITY, self.config.compression_quality]
+        return []
+    
+    def _write_image(self, file_path: Path, frame: np.ndarray) -> int:
+        """Encode a frame once, metadata-free, into an owner-only file; returns its size"""
+        data = self.image_processor.encode_without_metadata(
+            frame, self.config.image_format, self._imwrite_params()
+        )
+        _write_private(file_path, data)
+        return len(data)
+    
     def _generate_document_id(self) -> str:
         """Generate unique document ID"""
-        return str(uuid.uuid4())
+        return self.storage.new_document_id()
     
     def _call_progress(self, message: str, progress: float):
         """Call progress callback if set"""
@@ -494,70 +1258,278 @@ class DocumentCamera:
     
     def _secure_delete(self, file_path: str):
         """Securely delete file"""
-        if not os.path.exists(file_path):
-            return
+        if self._wipe_file(file_path, sync=True):
+            self._remove_file(file_path)
+    
+    @staticmethod
+    def _wipe_file(file_path: str, sync: bool) -> bool:
+        """Destroy a file's contents in place; returns False if the file doesn't exist
+        
+        With sync=False the overwrite is left in the page cache for a later batched syncfs.
+        """
+        st = _stat(file_path)
+        if st is None:
+            return False
         
         try:
-            file_size = os.path.getsize(file_path)
+            file_size = st.st_size
+            
+            with open(file_path, 'r+b', buffering=0) as f:
+                # Punching a hole hands the blocks back to the filesystem with no user-space
+                # write; on SSDs extra overwrite passes only land on remapped cells anyway
+                if not _punch_hole(f.fileno(), file_size):
+                    # Single random pass in bounded chunks, then one fsync unless batched
+                    _overwrite_random(f.fileno(), file_size)
+                    if sync:
+                        os.fsync(f.fileno())
+        except Exception:
+            pass  # Still removed by the caller
+        return True
+    
+    @staticmethod
+    def _remove_file(file_path: str):
+        """Unlink a file, ignoring errors"""
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+    
+    async def capture_document(self, doc_type: DocumentType = DocumentType.OTHER) -> CapturedDocument:
+        """Capture a new document photo with automatic OCR processing"""
+        document = await self._capture_unsaved(doc_type)
+        
+        # Save to database
+        self.storage.save_document(document)
+        
+        self._call_progress("Complete!", 1.0)
+        return document
+    
+    async def capture_multiple(self, count: int,
+                               doc_type: DocumentType = DocumentType.OTHER) -> List[CapturedDocument]:
+        """Capture several documents, OCR them in batches and store each batch in one transaction"""
+        documents = []
+        pending = []
+        ocr_task = None
+        in_flight = []  # Documents handed to ocr_task, saved only once it succeeds
+        next_frame = asyncio.ensure_future(self._read_frame()) if count > 0 else None
+        try:
+            for i in range(count):
+                frame = await next_frame
+                # Read the next frame while this one is processed
+                next_frame = asyncio.ensure_future(self._read_frame()) if i + 1 < count else None
+                document = await self._process_frame(frame, doc_type, run_ocr=False)
+                documents.append(document)
+                pending.append(document)
+                
+                # OCR a full batch while the following frames are captured, one batch in flight
+                if len(pending) >= self.config.batch_size and i + 1 < count:
+                    if ocr_task is not None:
+                        await ocr_task
+                    ocr_task = asyncio.ensure_future(self.ocr_batch(pending))
+                    in_flight, pending = pending, []
+            
+            if ocr_task is not None:
+                await ocr_task
+                ocr_task, in_flight = None, []
+            await self.ocr_batch(pending)
+        except BaseException:
+            # Let the in-flight batch commit rather than cancelling it; asyncio.wait never cancels it
+            if ocr_task is not None:
+                await asyncio.wait([ocr_task])
+                if ocr_task.cancelled() or ocr_task.exception() is not None:
+                    pending = in_flight + pending
+            
+            self._discard_unsaved(pending)
+            raise
+        finally:
+            if next_frame is not None and not next_frame.done():
+                next_frame.cancel()
+        
+        self._call_progress("Complete!", 1.0)
+        return documents
+    
+    async def ocr_batch(self, documents: List[CapturedDocument]) -> List[CapturedDocument]:
+        """Run TrOCR over several documents (batched per document type) and save them together"""
+        if not documents:
+            return documents
+        
+        loop = asyncio.get_running_loop()
+        try:
+            # Without TrOCR there is nothing to enhance for; record the empty result like the single path
+            if not _trocr_available():
+                for doc in documents:
+                    doc.ocr_text, doc.confidence_score, doc.is_processed = "", 0.0, True
+                self._call_progress("Saving documents...", 0.9)
+                self.storage.save_documents(documents)
+                return documents
+            
+            # Preprocess in worker threads (Pillow releases the GIL)
+            if self.config.auto_enhance:
+                self._call_progress("Enhancing images for OCR...", 0.5)
+            ocr_paths = await asyncio.gather(*(
+                loop.run_in_executor(None, self._prepare_for_ocr, doc.file_path, doc.file_path)
+                for doc in documents
+            ))
             
-            # Overwrite with random data
-            with open(file_path, 'r+b') as f:
-                for _ in range(3):  # 3 passes
-                    f.seek(0)
-                    f.write(os.urandom(file_size))
-                    f.flush()
-                    os.fsync(f.fileno())
+            self._call_progress("Extracting text with TrOCR...", 0.6)
             
-            os.remove(file_path)
+            # Handwritten and printed documents use different models
+            by_type = {}
+            for doc, path in zip(documents, ocr_paths):
+                by_type.setdefault(doc.document_type, []).append((doc, path))
+            
+            batch_size = self.config.batch_size
+            for doc_type, type_items in by_type.items():
+                for start in range(0, len(type_items), batch_size):
+                    items = type_items[start:start + batch_size]
+                    results = await loop.run_in_executor(
+                        None, self.image_processor.extract_text_batch, [path for _, path in items], doc_type
+                    )
+                    for (doc, path), (ocr_text, confidence) in zip(items, results):
+                        doc.ocr_text = ocr_text
+                        doc.confidence_score = confidence
+                        doc.is_processed = True
+                        _drop_page_cache(doc.file_path)
+                        if path != doc.file_path:
+                            _drop_page_cache(path)
+            
+            self._call_progress("Saving documents...", 0.9)
+            self.storage.save_documents(documents)
+            return documents
             
-        except Exception:
-            # Fallback to regular delete
+        except Exception as e:
+            if isinstance(e, CameraError):
+                raise
+            raise ImageProcessingError(f"Batch OCR failed: {e}")
+    
+    def _prepare_for_ocr(self, src: Union[str, np.ndarray], file_path: str) -> Union[str, np.ndarray]:
+        """OCR input for a saved image: its enhanced processed/ copy when auto_enhance, else src as is"""
+        if not self.config.auto_enhance:
+            return src
+        if isinstance(src, np.ndarray):
+            src = self.image_processor._to_rgb_image(src)
+        return self.image_processor.enhance_for_ocr(
+            src, self._get_processed_path(file_path), self.config.optimize_encoding
+        )
+    
+    async def _capture_unsaved(self, doc_type: DocumentType) -> CapturedDocument:
+        """Capture, process and OCR one frame without writing it to the database"""
+        frame = await self._read_frame()
+        return await self._process_frame(frame, doc_type)
+    
+    def _frame_loop(self):
+        """Background reader: open the camera once, then keep only the newest frame queued
+        
+        The camera belongs to this thread while it runs, so it is released here and never
+        concurrently with a read().
+        """
+        try:
             try:
-                os.remove(file_path)
-            except:
-                pass
+                self._initialize_camera()
+            except CameraError as e:
+                self._frame_error = e
+                return
+            
+            while not self._stop_frames.is_set():
+                ret, frame = self._camera.read()
+                if not ret:
+                    time.sleep(0.01)
+                    continue
+                
+                # Drop the stale frame so a capture always gets the latest one
+                try:
+                    self._latest_frame.get_nowait()
+                except queue.Empty:
+                    pass
+                self._latest_frame.put_nowait(frame)
+        finally:
+            self._release_camera()
     
-    async def capture_document(self, doc_type: DocumentType = DocumentType.OTHER) -> CapturedDocument:
-        """Capture a new document photo with automatic OCR processing"""
+    async def _read_frame(self) -> np.ndarray:
+        """Grab one frame without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        if self._frame_thread is not None:
+            return await self._next_prefetched_frame(loop)
+        
         try:
             self._call_progress("Initializing camera...", 0.1)
-            self._initialize_camera()
+            await loop.run_in_executor(None, self._initialize_camera)
             
             self._call_progress("Capturing image...", 0.2)
             
             # Capture frame
-            ret, frame = self._camera.read()
+            ret, frame = await loop.run_in_executor(None, self._camera.read)
             if not ret:
                 raise CameraError("Failed to capture image")
+            return frame
             
+        except Exception as e:
+            if isinstance(e, CameraError):
+                raise
+            raise CameraError(f"Capture failed: {e}")
+    
+    async def _next_prefetched_frame(self, loop) -> np.ndarray:
+        """Take the newest frame from the background reader"""
+        self._call_progress("Capturing image...", 0.2)
+        try:
+            return self._latest_frame.get_nowait()
+        except queue.Empty:
+            pass
+        
+        if self._frame_error is not None:
+            raise self._frame_error
+        try:
+            # Camera still opening or between frames
+            return await loop.run_in_executor(None, self._latest_frame.get, True, 5.0)
+        except queue.Empty:
+            raise self._frame_error or CameraError("Failed to capture image")
+    
+    async def _process_frame(self, frame: np.ndarray, doc_type: DocumentType, run_ocr: bool = True,
+                             source_path: Optional[str] = None,
+                             original_size: Optional[tuple] = None) -> CapturedDocument:
+        """Resize, write once without metadata and (optionally) OCR a decoded camera frame or import
+        
+        source_path marks an import (errors surface as StorageError); original_size overrides the
+        recorded dimensions when the frame was decoded at reduced scale.
+        """
+        loop = asyncio.get_running_loop()
+        try:
             # Generate unique filename
             doc_id = self._generate_document_id()
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{doc_type.value}_{timestamp}_{doc_id[:8]}.{self.config.image_format.lower()}"
+            filename = f"{doc_type.value}_{timestamp}_{doc_id[-8:]}.{self.config.image_format.lower()}"
             file_path = Path(self.config.save_directory) / filename
             
             self._call_progress("Processing image...", 0.3)
             
-            # Save original image
-            cv2.imwrite(str(file_path), frame)
-            
             # Get image dimensions
-            height, width = frame.shape[:2]
-            
-            # Apply privacy protection
-            self.image_processor.strip_metadata(str(file_path))
-            
-            # Resize if needed
-            if self.config.max_image_size:
-                self.image_processor.resize_image(str(file_path), self.config.max_image_size)
-            
-            self._call_progress("Extracting text with TrOCR...", 0.6)
+            if original_size:
+                width, height = original_size
+            else:
+                height, width = frame.shape[:2]
             
-            # Extract text with TrOCR
-            ocr_text, confidence = self.image_processor.extract_text_with_trocr(str(file_path), doc_type)
+            # Resize in memory, then encode once without metadata
+            frame = await loop.run_in_executor(
+                None, self.image_processor.resize_array, frame, self.config.max_image_size
+            )
+            file_size = await loop.run_in_executor(None, self._write_image, file_path, frame)
             
-            # Get final file size
-            file_size = os.path.getsize(file_path)
+            ocr_text, confidence = None, None
+            if run_ocr:
+                self._call_progress("Extracting text with TrOCR...", 0.6)
+                
+                # Extract text with TrOCR from the frame already in memory, enhanced as in ocr_batch
+                ocr_source = frame
+                if _trocr_available():
+                    ocr_source = await loop.run_in_executor(
+                        None, self._prepare_for_ocr, frame, str(file_path)
+                    )
+                ocr_text, confidence = await loop.run_in_executor(
+                    None, self.image_processor.extract_text_with_trocr, ocr_source, doc_type
+                )
+                
+                # Nothing reads this file again in this flow
+                _drop_page_cache(file_path)
             
             self._call_progress("Saving document...", 0.9)
             
@@ -570,154 +1542,219 @@ class DocumentCamera:
                 file_size=file_size,
                 image_width=width,
                 image_height=height,
-                is_processed=True,  # Mark as processed since we did OCR
+                is_processed=run_ocr,  # Mark as processed once OCR has run
                 ocr_text=ocr_text,
                 confidence_score=confidence
             )
             
-            # Save to database
-            self.storage.save_document(document)
-            
-            self._call_progress("Complete!", 1.0)
             return document
             
         except Exception as e:
             if isinstance(e, CameraError):
                 raise
+            if source_path is not None:
+                raise StorageError(f"Import failed: {e}")
             raise CameraError(f"Capture failed: {e}")
     
     async def import_from_file(self, file_path: str, doc_type: DocumentType) -> CapturedDocument:
         """Import existing image file with validation and OCR processing"""
+        document = await self._import_unsaved(file_path, doc_type)
+        
+        # Save to database
+        self.storage.save_document(document)
+        
+        self._call_progress("Complete!", 1.0)
+        return document
+    
+    async def import_from_files(self, file_paths: List[str], doc_type: DocumentType) -> List[CapturedDocument]:
+        """Import several image files, OCR them in batches and store them in one transaction"""
+        documents = []
+        try:
+            for file_path in file_paths:
+                documents.append(await self._import_unsaved(file_path, doc_type, run_ocr=False))
+            
+            await self.ocr_batch(documents)
+        except BaseException:
+            # ocr_batch saves last and in one transaction, so on any failure nothing was stored
+            self._discard_unsaved(documents)
+            raise
+        
+        self._call_progress("Complete!", 1.0)
+        return documents
+    
+    def _discard_unsaved(self, documents: List[CapturedDocument]):
+        """Securely delete the files of documents that never reached the database
+        
+        They would otherwise stay on disk unreachable through the API.
+        """
+        for document in documents:
+            for path in (document.file_path, self._get_processed_path(document.file_path)):
+                self._secure_delete(path)
+    
+    async def _import_unsaved(self, file_path: str, doc_type: DocumentType,
+                              run_ocr: bool = True) -> CapturedDocument:
+        """Validate, decode and (optionally) OCR one image file without writing it to the database"""
+        loop = asyncio.get_running_loop()
         try:
-            if not os.path.exists(file_path):
+            st = _stat(file_path)
+            if st is None:
                 raise StorageError(f"File not found: {file_path}")
-            
-            # Validate file safety
-            if not self.image_processor.validate_file_safety(file_path):
+            if st.st_size > self.image_processor.MAX_FILE_SIZE:
                 raise StorageError("Invalid or unsafe file type")
             
             self._call_progress("Reading file...", 0.1)
             
-            # Read image to get dimensions
-            image = cv2.imread(file_path)
-            if image is None:
-                raise ImageProcessingError("Invalid image file")
-            
-            height, width = image.shape[:2]
-            
-            # Generate new filename in our storage directory
-            doc_id = self._generate_document_id()
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{doc_type.value}_{timestamp}_{doc_id[:8]}.{self.config.image_format.lower()}"
-            new_path = Path(self.config.save_directory) / filename
-            
-            self._call_progress("Copying and processing file...", 0.3)
+            # One read; validation and decode both work on these bytes
+            raw = await loop.run_in_executor(None, Path(file_path).read_bytes)
             
-            # Copy to our storage directory
-            shutil.copy2(file_path, new_path)
-            
-            # Apply privacy protection
-            self.image_processor.strip_metadata(str(new_path))
-            
-            # Resize if needed
-            if self.config.max_image_size:
-                self.image_processor.resize_image(str(new_path), self.config.max_image_size)
-            
-            self._call_progress("Extracting text with TrOCR...", 0.6)
-            
-            # Extract text with TrOCR
-            ocr_text, confidence = self.image_processor.extract_text_with_trocr(str(new_path), doc_type)
-            
-            file_size = os.path.getsize(new_path)
-            
-            self._call_progress("Saving document...", 0.9)
+            # Validate file safety (the full structural check is opt-in; the decode rejects the rest)
+            if self.config.strict_validation:
+                is_safe = self.image_processor.validate_file_safety(file_path)
+            else:
+                is_safe = self.image_processor.validate_file_safety_fast(raw)
+            if not is_safe:
+                raise StorageError("Invalid or unsafe file type")
             
-            # Create document object with OCR results
-            document = CapturedDocument(
-                id=doc_id,
-                file_path=str(new_path),
-                document_type=doc_type,
-                capture_date=datetime.now(),
-                file_size=file_size,
-                image_width=width,
-                image_height=height,
-                is_processed=True,  # Mark as processed since we did OCR
-                ocr_text=ocr_text,
-                confidence_score=confidence
+            # Size from the header, then decode (reduced-scale for large JPEGs)
+            image, width, height = await loop.run_in_executor(
+                None, self.image_processor.decode_for_size, raw, self.config.max_image_size
             )
-            
-            # Save to database
-            self.storage.save_document(document)
-            
-            self._call_progress("Complete!", 1.0)
-            return document
+            if image is None:
+                raise ImageProcessingError("Invalid image file")
             
         except Exception as e:
             if isinstance(e, (StorageError, ImageProcessingError)):
                 raise
             raise StorageError(f"Import failed: {e}")
+        
+        # From here on an import is handled exactly like a camera frame
+        return await self._process_frame(image, doc_type, run_ocr,
+                                         source_path=file_path, original_size=(width, height))
     
     def get_all_documents(self) -> List[CapturedDocument]:
         """Get list of all captured documents"""
         return self.storage.get_all_documents()
     
+    def get_documents_frame(self, doc_type: Optional[DocumentType] = None) -> dict:
+        """Get document metadata as column arrays for list views"""
+        return self.storage.get_all_as_frame(doc_type)
+    
     def get_documents_by_type(self, doc_type: DocumentType) -> List[CapturedDocument]:
         """Filter documents by type"""
-        all_docs = self.get_all_documents()
-        return [doc for doc in all_docs if doc.document_type == doc_type]
+        return self.storage.get_documents_by_type(doc_type)
     
     def delete_document(self, document_id: str) -> bool:
         """Delete a document and its file securely"""
         try:
-            documents = self.get_all_documents()
-            doc_to_delete = None
-            
-            for doc in documents:
-                if doc.id == document_id:
-                    doc_to_delete = doc
-                    break
+            # Row lookup and delete happen in one transaction
+            file_path = self.storage.pop_document(document_id)
             
-            if not doc_to_delete:
+            if file_path is None:
                 return False
             
-            # Secure delete file
-            if os.path.exists(doc_to_delete.file_path):
-                self._secure_delete(doc_to_delete.file_path)
+            paths = (file_path, self._get_processed_path(file_path))
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # No event loop: overwrite the files inline (no-op if already gone)
+                for path in paths:
+                    self._secure_delete(path)
+            else:
+                # Inside an event loop the overwrite runs in the background
+                task = loop.create_task(self._secure_delete_async(*paths))
+                self._pending_deletes.add(task)
+                task.add_done_callback(self._pending_deletes.discard)
             
-            # Delete processed version if exists
-            processed_path = self._get_processed_path(doc_to_delete.file_path)
-            if os.path.exists(processed_path):
-                self._secure_delete(processed_path)
+            return True
             
-            # Delete from database
-            return self.storage.delete_document(document_id)
+        except Exception as e:
+            raise StorageError(f"Failed to delete document: {e}")
+    
+    def delete_documents(self, document_ids: List[str]) -> int:
+        """Delete several documents; file overwrites are flushed with one syncfs instead of an fsync each"""
+        try:
+            popped = self.storage.pop_documents(document_ids)
+            
+            paths = []
+            for file_path in popped.values():
+                paths.extend((file_path, self._get_processed_path(file_path)))
+            
+            # Overwrite everything first, make it durable once, and only then unlink
+            batched = _libc_function('syncfs', ctypes.c_int) is not None
+            wiped = [path for path in paths if self._wipe_file(path, sync=not batched)]
+            if wiped and batched and not _syncfs(self.config.save_directory):
+                # syncfs failed; fall back to syncing every dirty page
+                os.sync()
+            for path in wiped:
+                self._remove_file(path)
+            
+            return len(popped)
+            
+        except Exception as e:
+            raise StorageError(f"Failed to delete documents: {e}")
+    
+    async def delete_document_async(self, document_id: str) -> bool:
+        """Delete a document without blocking the event loop on file overwrite/fsync"""
+        try:
+            file_path = self.storage.pop_document(document_id)
+            
+            if file_path is None:
+                return False
+            
+            await self._secure_delete_async(file_path, self._get_processed_path(file_path))
+            return True
             
         except Exception as e:
             raise StorageError(f"Failed to delete document: {e}")
     
+    async def _secure_delete_async(self, *file_paths: str):
+        """Securely delete several files concurrently on the default executor"""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(None, self._secure_delete, path) for path in file_paths
+        ))
+    
     def _get_processed_path(self, original_path: str) -> str:
         """Generate path for processed image"""
-        path_obj = Path(original_path)
-        processed_dir = path_obj.parent / "processed"
-        processed_dir.mkdir(exist_ok=True, mode=0o700)
-        
-        stem = path_obj.stem + "_processed"
-        return str(processed_dir / f"{stem}{path_obj.suffix}")
+        directory, filename = os.path.split(original_path)
+        stem, suffix = os.path.splitext(filename)
+        processed_dir = _ensure_dir(os.path.join(directory, "processed"))
+        return os.path.join(processed_dir, f"{stem}_processed{suffix}")
     
     def set_progress_callback(self, callback: Callable[[str, float], None]):
         """Set function to call during long operations"""
         self.progress_callback = callback
     
     def cleanup(self):
-        """Release camera resources"""
+        """Release camera resources
+        
+        Mandatory with prefetch_frames: the frame thread keeps this instance alive, so __del__
+        never runs while it is prefetching.
+        """
+        if self._frame_thread is not None:
+            self._stop_frames.set()
+            self._frame_thread.join(timeout=2.0)
+            if self._frame_thread.is_alive():
+                return  # Still blocked in read(); the thread releases the camera when it returns
+            self._frame_thread = None
+        
+        self._release_camera()
+    
+    def _release_camera(self):
+        """Release the camera if it is open"""
         if self._camera is not None:
             self._camera.release()
             self._camera = None
             print("Camera resources released")
     
+    def close(self):
+        """Release the camera and close the document database; the instance is unusable afterwards"""
+        self.cleanup()
+        self.storage.close()
+    
     def __del__(self):
         """Cleanup when object is destroyed"""
-        self.cleanup()
+        self.close()
 
 
 # Testing and example usage
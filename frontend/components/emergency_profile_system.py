@@ -7,12 +7,99 @@ import json
 import qrcode
 import io
 import base64
+import hashlib
 from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, asdict, field, fields
 from typing import List, Dict, Optional, Any
 from enum import Enum
 from pathlib import Path
+from collections import OrderedDict
 import sqlite3
+import threading
+import logging
+import os
+import sys
+import weakref
+import re
+import zlib
+
+# Optional C JSON encoder for the QR payload
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Optional faster QR encoder; the pure-Python qrcode package is the fallback
+try:
+    import segno
+    SEGNO_AVAILABLE = True
+except ImportError:
+    SEGNO_AVAILABLE = False
+
+
+def _dumps_compact(data: Dict[str, Any]) -> bytes:
+    """Serialize to compact UTF-8 JSON, using orjson when installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_NAIVE_UTC)
+    return json.dumps(data, separators=(',', ':')).encode()
+
+
+# QR payload: header followed by zlib-compressed compact JSON, stored in byte mode
+QR_PAYLOAD_HEADER = b"ME1:"
+
+
+def encode_emergency_payload(data: Dict[str, Any]) -> bytes:
+    """Build the compressed QR payload for an emergency dict"""
+    return _compress_payload(_dumps_compact(data))
+
+
+def _compress_payload(json_bytes: bytes) -> bytes:
+    """Prefix the header to zlib-compressed JSON bytes"""
+    return QR_PAYLOAD_HEADER + zlib.compress(json_bytes, 9)
+
+
+def _save_qr_png(payload: bytes, target):
+    """Encode payload as a low error-correction QR and save it as PNG to a path or stream"""
+    if SEGNO_AVAILABLE:
+        segno.make(payload, error='L', micro=False).save(
+            target, kind='png', scale=10, border=4, dark='black', light='white'
+        )
+        return
+    
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(payload)
+    qr.make(fit=True)
+    qr.make_image(fill_color="black", back_color="white").save(target)
+
+
+def decode_emergency_payload(payload: bytes) -> Dict[str, Any]:
+    """Reader side: strip the header, inflate and parse a scanned QR payload"""
+    if not payload.startswith(QR_PAYLOAD_HEADER):
+        raise ValueError("Not an emergency QR payload")
+    return json.loads(zlib.decompress(payload[len(QR_PAYLOAD_HEADER):]))
+
+
+def _slotted_dataclass(cls):
+    """@dataclass with __slots__; dataclass(slots=True) only exists on Python 3.10+"""
+    if sys.version_info >= (3, 10):
+        return dataclass(slots=True)(cls)
+    
+    # Same approach as 3.10: rebuild the class with slots for its fields. Defaults already live
+    # in the generated __init__, and would clash with the slot descriptors if left on the class
+    cls = dataclass(cls)
+    names = tuple(f.name for f in fields(cls))
+    namespace = {
+        key: value for key, value in cls.__dict__.items()
+        if key not in names and key not in ('__dict__', '__weakref__')
+    }
+    namespace['__slots__'] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
 
 
 class BloodType(Enum):
@@ -34,7 +121,12 @@ class SeverityLevel(Enum):
     LOW = "low"
 
 
-@dataclass
+# Stored value -> member maps, already built by Enum; a dict lookup skips Enum.__call__
+_SEV_MAP = SeverityLevel._value2member_map_
+_BLOOD_MAP = BloodType._value2member_map_
+
+
+@_slotted_dataclass
 class EmergencyContact:
     name: str
     relationship: str
@@ -42,7 +134,7 @@ class EmergencyContact:
     alternate_phone: Optional[str] = None
 
 
-@dataclass
+@_slotted_dataclass
 class Allergy:
     substance: str
     reaction: str
@@ -50,7 +142,7 @@ class Allergy:
     verified_date: Optional[datetime] = None
 
 
-@dataclass
+@_slotted_dataclass
 class Medication:
     name: str
     dosage: str
@@ -61,7 +153,7 @@ class Medication:
     notes: Optional[str] = None
 
 
-@dataclass
+@_slotted_dataclass
 class MedicalCondition:
     condition: str
     diagnosed_date: datetime
@@ -70,7 +162,7 @@ class MedicalCondition:
     treating_doctor: Optional[str] = None
 
 
-@dataclass
+@_slotted_dataclass
 class Surgery:
     procedure: str
     date: datetime
@@ -79,7 +171,7 @@ class Surgery:
     implants_devices: Optional[str] = None
 
 
-@dataclass
+@_slotted_dataclass
 class VitalMetric:
     metric_type: str  # "blood_pressure", "glucose", "heart_rate", etc.
     value: str
@@ -89,7 +181,103 @@ class VitalMetric:
     is_abnormal: bool = False
 
 
-@dataclass
+# Layout of the responder-facing dict: each leaf is a Python expression over `self`.
+# compile_to_dict turns it into one flat function at class definition time.
+EMERGENCY_DICT_LAYOUT = {
+    "patient": {
+        "name": "self.patient_name",
+        "age": "_age_from(now, self.date_of_birth)",
+        "dob": "self.date_of_birth.strftime('%Y-%m-%d')",
+        "blood_type": "self.blood_type.value",
+        "gender": "self.gender",
+        "weight_kg": "self.weight_kg",
+        "height_cm": "self.height_cm",
+    },
+    "critical_allergies": (
+        "[{'substance': a.substance, 'reaction': a.reaction, 'severity': a.severity.value}"
+        " for a in self.allergies if a.severity in _urgent]"
+    ),
+    "current_medications": (
+        "[{'name': m.name, 'dosage': m.dosage, 'critical': m.is_critical}"
+        " for m in self.medications]"
+    ),
+    "conditions": (
+        "[{'condition': c.condition, 'status': c.current_status, 'severity': c.severity.value}"
+        " for c in self.medical_conditions if c.current_status == 'active']"
+    ),
+    "devices": "self.medical_devices",
+    "emergency_contact": {
+        "name": "contact.name",
+        "phone": "contact.phone",
+        "relationship": "contact.relationship",
+    },
+    "doctor": {
+        "name": "self.primary_doctor",
+        "phone": "self.primary_doctor_phone",
+    },
+    # Last 10 readings, abnormal or from the last 3 days
+    "recent_vitals": (
+        "[{'type': v.metric_type, 'value': v.value, 'date': v.recorded_date.strftime('%Y-%m-%d'), 'abnormal': v.is_abnormal}"
+        " for v in self.recent_vitals[-10:] if v.is_abnormal or v.recorded_date > recent_cutoff]"
+    ),
+    # Last 5 surgeries
+    "major_surgeries": (
+        "[{'procedure': s.procedure, 'date': s.date.strftime('%Y-%m-%d'), 'implants': s.implants_devices}"
+        " for s in self.surgeries[-5:]]"
+    ),
+    "directives": "self.advance_directives",
+    "updated": "self.last_updated.strftime('%Y-%m-%d %H:%M')",
+}
+
+
+def _age_from(now: datetime, dob: datetime) -> int:
+    """Whole years between dob and now; the tuple compare subtracts one before the birthday"""
+    return now.year - dob.year - ((now.month, now.day) < (dob.month, dob.day))
+
+
+def compile_to_dict(layout: Dict[str, Any], name: str = "to_emergency_dict"):
+    """Class decorator that code-generates a dict serializer from a layout"""
+    def _emit(node, indent: str) -> str:
+        if not isinstance(node, dict):
+            return node
+        inner = indent + "    "
+        items = ",\n".join(f"{inner}{key!r}: {_emit(value, inner)}" for key, value in node.items())
+        return "{\n" + items + "\n" + indent + "}"
+    
+    def decorator(cls):
+        # Reject layouts that reference attributes the dataclass does not have
+        fields = cls.__dataclass_fields__
+        source_text = repr(layout)
+        for attr in re.findall(r"self\.(\w+)", source_text):
+            if attr not in fields and not hasattr(cls, attr):
+                raise AttributeError(f"{cls.__name__} has no field '{attr}' used in {name} layout")
+        
+        # Enum members, filters and the clock are bound as defaults so the body only reads locals
+        source = (
+            f"def {name}(self, _urgent=_URGENT, _now=_now, _recent=_RECENT_WINDOW):\n"
+            f"    now = _now()\n"
+            f"    recent_cutoff = now - _recent\n"
+            f"    contact = self.emergency_contact\n"
+            f"    return {_emit(layout, '    ')}\n"
+        )
+        namespace = {
+            "_URGENT": frozenset((SeverityLevel.CRITICAL, SeverityLevel.HIGH)),
+            "_RECENT_WINDOW": timedelta(days=3),
+            "_now": datetime.now,
+            "_age_from": _age_from,
+        }
+        exec(compile(source, f"<{cls.__name__}.{name}>", "exec"), namespace)
+        function = namespace[name]
+        function.__doc__ = "Convert to dictionary optimized for emergency responders"
+        function.__qualname__ = f"{cls.__name__}.{name}"
+        setattr(cls, name, function)
+        return cls
+    
+    return decorator
+
+
+@compile_to_dict(EMERGENCY_DICT_LAYOUT)
+@_slotted_dataclass
 class EmergencyProfile:
     """Complete emergency medical profile"""
     # Basic Information (required)
@@ -119,339 +307,467 @@ class EmergencyProfile:
     insurance_info: Optional[str] = None
     profile_version: str = "1.0"
     
-    def to_emergency_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary optimized for emergency responders"""
-        return {
-            "patient": {
-                "name": self.patient_name,
-                "age": self._calculate_age(),
-                "dob": self.date_of_birth.strftime("%Y-%m-%d"),
-                "blood_type": self.blood_type.value,
-                "gender": self.gender,
-                "weight_kg": self.weight_kg,
-                "height_cm": self.height_cm
-            },
-            "critical_allergies": [
-                {
-                    "substance": allergy.substance,
-                    "reaction": allergy.reaction,
-                    "severity": allergy.severity.value
-                }
-                for allergy in self.allergies 
-                if allergy.severity in [SeverityLevel.CRITICAL, SeverityLevel.HIGH]
-            ],
-            "current_medications": [
-                {
-                    "name": med.name,
-                    "dosage": med.dosage,
-                    "critical": med.is_critical
-                }
-                for med in self.medications
-            ],
-            "conditions": [
-                {
-                    "condition": cond.condition,
-                    "status": cond.current_status,
-                    "severity": cond.severity.value
-                }
-                for cond in self.medical_conditions
-                if cond.current_status == "active"
-            ],
-            "devices": self.medical_devices,
-            "emergency_contact": {
-                "name": self.emergency_contact.name,
-                "phone": self.emergency_contact.phone,
-                "relationship": self.emergency_contact.relationship
-            },
-            "doctor": {
-                "name": self.primary_doctor,
-                "phone": self.primary_doctor_phone
-            },
-            "recent_vitals": [
-                {
-                    "type": vital.metric_type,
-                    "value": vital.value,
-                    "date": vital.recorded_date.strftime("%Y-%m-%d"),
-                    "abnormal": vital.is_abnormal
-                }
-                for vital in self.recent_vitals[-10:]  # Last 10 readings
-                if vital.is_abnormal or vital.recorded_date > datetime.now() - timedelta(days=3)
-            ],
-            "major_surgeries": [
-                {
-                    "procedure": surgery.procedure,
-                    "date": surgery.date.strftime("%Y-%m-%d"),
-                    "implants": surgery.implants_devices
-                }
-                for surgery in self.surgeries[-5:]  # Last 5 surgeries
-            ],
-            "directives": self.advance_directives,
-            "updated": self.last_updated.strftime("%Y-%m-%d %H:%M")
-        }
-    
-    def _calculate_age(self) -> int:
+    def _calculate_age(self, now: datetime = None) -> int:
         """Calculate current age"""
-        today = datetime.now().date()
-        birth_date = self.date_of_birth.date()
-        age = today.year - birth_date.year
-        if today < birth_date.replace(year=today.year):
-            age -= 1
-        return age
+        return _age_from(now or datetime.now(), self.date_of_birth)
+
+
+# Fixed parts of export_emergency_profile_text
+_TEXT_EXPORT_HEADER = (
+    "=== EMERGENCY MEDICAL INFORMATION ===\n"
+    "Patient: {name}\n"
+    "DOB: {dob} (Age: {age})\n"
+    "Blood Type: {blood_type}\n"
+    "Gender: {gender}\n"
+    "\n"
+    "CRITICAL ALLERGIES:\n"
+)
+_TEXT_EXPORT_FOOTER = (
+    "\n"
+    "Emergency Contact: {contact_name} ({relationship})\n"
+    "Phone: {phone}\n"
+    "Updated: {updated}"
+)
 
 
 class EmergencyProfileManager:
     """Manages emergency profile data and QR code generation"""
     
+    _INSERT_ALLERGY_SQL = '''
+        INSERT INTO allergies 
+        (substance, reaction, severity, verified_date)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(substance) DO UPDATE SET
+            reaction = excluded.reaction,
+            severity = excluded.severity,
+            verified_date = excluded.verified_date
+    '''
+    
+    _INSERT_MEDICATION_SQL = '''
+        INSERT INTO medications 
+        (name, dosage, frequency, prescribing_doctor, start_date, is_critical)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(name, dosage) DO UPDATE SET
+            frequency = excluded.frequency,
+            prescribing_doctor = excluded.prescribing_doctor,
+            start_date = excluded.start_date,
+            is_critical = excluded.is_critical,
+            is_active = TRUE
+    '''
+    
+    _INSERT_VITAL_SQL = '''
+        INSERT INTO vitals 
+        (metric_type, value, unit, recorded_date, recorded_epoch, source, is_abnormal)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    # The whole profile in one statement: each row carries a tag naming its source table
+    # ('p'atient, 'a'llergy, 'm'edication, 'c'ontact, 'v'ital), padded with NULLs to 7 columns
+    _SELECT_PROFILE_SQL = '''
+        SELECT * FROM (
+            SELECT 'p', name, date_of_birth, blood_type, gender, NULL, NULL, NULL
+            FROM patient_info WHERE id = 1
+        )
+        UNION ALL
+        SELECT * FROM (
+            -- Only allergies responders act on (critical/high)
+            SELECT 'a', substance, reaction, severity, verified_date, NULL, NULL, NULL
+            FROM allergies WHERE severity IN ('critical', 'high')
+        )
+        UNION ALL
+        SELECT * FROM (
+            SELECT 'm', name, dosage, frequency, prescribing_doctor, start_date, is_critical, notes
+            FROM medications WHERE is_active = TRUE
+        )
+        UNION ALL
+        SELECT * FROM (
+            SELECT 'c', name, relationship, phone, alternate_phone, NULL, NULL, NULL
+            FROM emergency_contact WHERE is_primary = TRUE LIMIT 1
+        )
+        UNION ALL
+        SELECT * FROM (
+            -- Newest 10 of the last week's readings that are abnormal or from the last 3 days
+            SELECT 'v', metric_type, value, unit, recorded_epoch, source, is_abnormal, NULL
+            FROM vitals
+            WHERE recorded_epoch > ? AND (is_abnormal = 1 OR recorded_epoch > ?)
+            ORDER BY recorded_epoch DESC, id DESC LIMIT 10
+        )
+    '''
+    
+    _SCHEMA_SQL = '''
+        PRAGMA journal_mode=WAL;
+        PRAGMA synchronous=NORMAL;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA cache_size=-20000;
+        
+        -- Patient basic info
+        CREATE TABLE IF NOT EXISTS patient_info (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            date_of_birth TEXT NOT NULL,
+            blood_type TEXT NOT NULL,
+            gender TEXT NOT NULL,
+            weight_kg REAL,
+            height_cm REAL,
+            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        
+        -- Allergies
+        CREATE TABLE IF NOT EXISTS allergies (
+            id INTEGER PRIMARY KEY,
+            substance TEXT NOT NULL UNIQUE,
+            reaction TEXT NOT NULL,
+            severity TEXT NOT NULL,
+            verified_date TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        
+        -- Medications
+        CREATE TABLE IF NOT EXISTS medications (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            dosage TEXT NOT NULL,
+            frequency TEXT NOT NULL,
+            prescribing_doctor TEXT NOT NULL,
+            start_date TEXT NOT NULL,
+            is_critical BOOLEAN DEFAULT FALSE,
+            is_active BOOLEAN DEFAULT TRUE,
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(name, dosage)
+        );
+        
+        -- Medical conditions
+        CREATE TABLE IF NOT EXISTS medical_conditions (
+            id INTEGER PRIMARY KEY,
+            condition TEXT NOT NULL,
+            diagnosed_date TEXT NOT NULL,
+            severity TEXT NOT NULL,
+            current_status TEXT NOT NULL,
+            treating_doctor TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        
+        -- Emergency contact
+        CREATE TABLE IF NOT EXISTS emergency_contact (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            relationship TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            alternate_phone TEXT,
+            is_primary BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        
+        -- Recent vitals (from wearables and tests)
+        CREATE TABLE IF NOT EXISTS vitals (
+            id INTEGER PRIMARY KEY,
+            metric_type TEXT NOT NULL,
+            value TEXT NOT NULL,
+            unit TEXT NOT NULL,
+            recorded_date TEXT NOT NULL,
+            recorded_epoch INTEGER,
+            source TEXT NOT NULL,
+            is_abnormal BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        
+        -- Indexes backing the filtered profile reads
+        CREATE INDEX IF NOT EXISTS allergies_sev_idx ON allergies(severity);
+        CREATE INDEX IF NOT EXISTS med_active_idx ON medications(is_active) WHERE is_active = TRUE;
+        CREATE INDEX IF NOT EXISTS contact_primary_idx ON emergency_contact(is_primary) WHERE is_primary = TRUE;
+    '''
+    
+    # Rendered QR PNGs kept in memory, keyed by a digest of the emergency data
+    _QR_CACHE_SIZE = 8
+    
     def __init__(self, storage_directory: str):
         self.storage_path = Path(storage_directory)
         self.storage_path.mkdir(exist_ok=True)
         self.db_path = self.storage_path / "emergency_profile.db"
         self.qr_cache_path = self.storage_path / "emergency_qr.png"
+        self._lock = threading.Lock()
+        self._qr_cache: "OrderedDict[bytes, bytes]" = OrderedDict()
+        self._qr_file_png = None  # PNG bytes last written to qr_cache_path
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        # Closes the connection when the manager is collected or at interpreter exit
+        self._close_conn = weakref.finalize(self, self._optimize_and_close, self._conn)
         self._init_database()
     
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._close_conn()
+    
+    @staticmethod
+    def _optimize_and_close(conn: sqlite3.Connection):
+        """Let SQLite re-analyze tables whose statistics went stale, then close the connection"""
+        try:
+            conn.execute('PRAGMA optimize')
+        except sqlite3.Error:
+            pass
+        conn.close()
+    
     def _init_database(self):
         """Initialize emergency profile database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Patient basic info
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS patient_info (
-                id INTEGER PRIMARY KEY,
-                name TEXT NOT NULL,
-                date_of_birth TEXT NOT NULL,
-                blood_type TEXT NOT NULL,
-                gender TEXT NOT NULL,
-                weight_kg REAL,
-                height_cm REAL,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Allergies
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS allergies (
-                id INTEGER PRIMARY KEY,
-                substance TEXT NOT NULL,
-                reaction TEXT NOT NULL,
-                severity TEXT NOT NULL,
-                verified_date TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Medications
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS medications (
-                id INTEGER PRIMARY KEY,
-                name TEXT NOT NULL,
-                dosage TEXT NOT NULL,
-                frequency TEXT NOT NULL,
-                prescribing_doctor TEXT NOT NULL,
-                start_date TEXT NOT NULL,
-                is_critical BOOLEAN DEFAULT FALSE,
-                is_active BOOLEAN DEFAULT TRUE,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Medical conditions
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS medical_conditions (
-                id INTEGER PRIMARY KEY,
-                condition TEXT NOT NULL,
-                diagnosed_date TEXT NOT NULL,
-                severity TEXT NOT NULL,
-                current_status TEXT NOT NULL,
-                treating_doctor TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Emergency contact
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS emergency_contact (
-                id INTEGER PRIMARY KEY,
-                name TEXT NOT NULL,
-                relationship TEXT NOT NULL,
-                phone TEXT NOT NULL,
-                alternate_phone TEXT,
-                is_primary BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Recent vitals (from wearables and tests)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS vitals (
-                id INTEGER PRIMARY KEY,
-                metric_type TEXT NOT NULL,
-                value TEXT NOT NULL,
-                unit TEXT NOT NULL,
-                recorded_date TEXT NOT NULL,
-                source TEXT NOT NULL,
-                is_abnormal BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        cursor = self._conn.cursor()
+        
+        # A new database or one that still needs migrating gets fresh planner statistics below
+        migrated = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'vitals_epoch_idx'"
+        ).fetchone() is None
+        
+        # Whole schema in one script: one parse instead of a round-trip per statement
+        cursor.executescript(self._SCHEMA_SQL)
+        
+        # One-shot migration: vitals read epoch seconds instead of parsing ISO strings
+        vital_columns = {row[1] for row in cursor.execute('PRAGMA table_info(vitals)')}
+        if 'recorded_epoch' not in vital_columns:
+            cursor.execute('ALTER TABLE vitals ADD COLUMN recorded_epoch INTEGER')
+            # recorded_date holds naive local time, matching datetime.timestamp()
+            cursor.execute('''
+                UPDATE vitals
+                SET recorded_epoch = CAST(strftime('%s', recorded_date, 'utc') AS INTEGER)
+            ''')
+            migrated = True
+        
+        # Tables created before the upsert keys existed get them now. Duplicates are merged into
+        # the newest row so no safety flag is lost: most severe allergy severity, any critical or
+        # active medication flag, earliest start date, and every distinct reaction/note
+        migrated |= self._ensure_unique(cursor, 'allergies', ('substance',), {
+            'severity': '''SELECT d.severity {group} ORDER BY CASE d.severity
+                WHEN 'critical' THEN 0 WHEN 'high' THEN 1 WHEN 'moderate' THEN 2 ELSE 3 END, d.id DESC
+                LIMIT 1''',
+            'reaction': "SELECT group_concat(DISTINCT d.reaction) {group}",
+            'verified_date': "SELECT MAX(d.verified_date) {group}",
+        })
+        migrated |= self._ensure_unique(cursor, 'medications', ('name', 'dosage'), {
+            'is_critical': "SELECT MAX(d.is_critical) {group}",
+            'is_active': "SELECT MAX(d.is_active) {group}",
+            'start_date': "SELECT MIN(d.start_date) {group}",
+            'notes': "SELECT group_concat(DISTINCT d.notes) {group}",
+        })
+        
+        # The vitals index needs recorded_epoch, which may only exist after the migration
+        # Batch inserts share one whole-second epoch, so ties are broken by id (newest row first);
+        # an ascending index ends in rowid, so scanning it backwards yields epoch DESC, id DESC
+        cursor.execute('DROP INDEX IF EXISTS vitals_recorded_idx')
+        cursor.execute('DROP INDEX IF EXISTS vitals_recorded_epoch_idx')
+        cursor.execute('CREATE INDEX IF NOT EXISTS vitals_epoch_idx ON vitals(recorded_epoch)')
+        
+        # Refresh planner statistics so the partial indexes' selectivity is known; a full ANALYZE
+        # only after schema changes, otherwise PRAGMA optimize on close re-analyzes stale tables
+        if migrated:
+            cursor.execute('ANALYZE')
+    
+    def _ensure_unique(self, cursor, table: str, columns: tuple, merge: Dict[str, str]) -> bool:
+        """Add a unique index on columns, first merging duplicates into the newest row of each group
+        
+        merge maps a column to a scalar SELECT over the duplicate group; "{group}" expands to the
+        FROM/WHERE clause selecting the group as alias d. Removed rows are written to the audit log.
+        Returns whether the index had to be created.
+        """
+        for _, index_name, unique, *_ in cursor.execute(f'PRAGMA index_list({table})').fetchall():
+            if unique and tuple(row[2] for row in cursor.execute(f'PRAGMA index_info({index_name})')) == columns:
+                return False
+        
+        column_list = ', '.join(columns)
+        group = f"FROM {table} AS d WHERE " + " AND ".join(f"d.{c} IS t.{c}" for c in columns)
+        survivors = f"SELECT MAX(id) FROM {table} GROUP BY {column_list} HAVING COUNT(*) > 1"
+        
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            doomed = cursor.execute(
+                f"SELECT * FROM {table} WHERE id NOT IN (SELECT MAX(id) FROM {table} GROUP BY {column_list})"
             )
-        ''')
-        
-        conn.commit()
-        conn.close()
+            names = [description[0] for description in doomed.description]
+            doomed = [dict(zip(names, row)) for row in doomed.fetchall()]
+            
+            if doomed:
+                assignments = ', '.join(f"{column} = ({sql.format(group=group)})" for column, sql in merge.items())
+                cursor.execute(f"UPDATE {table} AS t SET {assignments} WHERE t.id IN ({survivors})")
+                cursor.execute(f"DELETE FROM {table} WHERE id NOT IN (SELECT MAX(id) FROM {table} GROUP BY {column_list})")
+            
+            cursor.execute(f'CREATE UNIQUE INDEX {table}_{"_".join(columns)}_uq ON {table}({column_list})')
+            cursor.execute('COMMIT')
+        except Exception:
+            cursor.execute('ROLLBACK')
+            raise
+        
+        if doomed:
+            audit_logger = self._setup_audit_logger()
+            for row in doomed:
+                audit_logger.warning(f"Merged duplicate {table} row into newest {column_list} entry: {row}")
+        return True
+    
+    def _setup_audit_logger(self) -> logging.Logger:
+        """Setup audit logging for schema migrations that rewrite patient data"""
+        logger = logging.getLogger('emergency_audit')
+        logger.setLevel(logging.INFO)
+        
+        # Remove existing handlers to prevent duplicates
+        for handler in logger.handlers[:]:
+            logger.removeHandler(handler)
+        
+        log_file = self.storage_path / 'emergency_audit.log'
+        handler = logging.FileHandler(log_file)
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+        
+        # Secure log file permissions
+        if log_file.exists():
+            os.chmod(log_file, 0o600)
+        
+        return logger
     
     def update_patient_info(self, name: str, dob: datetime, blood_type: BloodType, 
                           gender: str, weight_kg: float = None, height_cm: float = None):
         """Update basic patient information"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._lock:
+            self._conn.execute('''
+                INSERT OR REPLACE INTO patient_info 
+                (id, name, date_of_birth, blood_type, gender, weight_kg, height_cm)
+                VALUES (1, ?, ?, ?, ?, ?, ?)
+            ''', (name, dob.isoformat(), blood_type.value, gender, weight_kg, height_cm))
         
-        cursor.execute('''
-            INSERT OR REPLACE INTO patient_info 
-            (id, name, date_of_birth, blood_type, gender, weight_kg, height_cm)
-            VALUES (1, ?, ?, ?, ?, ?, ?)
-        ''', (name, dob.isoformat(), blood_type.value, gender, weight_kg, height_cm))
-        
-        conn.commit()
-        conn.close()
         self._invalidate_qr_cache()
     
     def add_allergy(self, substance: str, reaction: str, severity: SeverityLevel):
         """Add or update allergy information"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO allergies 
-            (substance, reaction, severity, verified_date)
-            VALUES (?, ?, ?, ?)
-        ''', (substance, reaction, severity.value, datetime.now().isoformat()))
-        
-        conn.commit()
-        conn.close()
-        self._invalidate_qr_cache()
+        self.add_allergies([(substance, reaction, severity)])
+    
+    def add_allergies(self, rows: List[tuple]):
+        """Add or update several (substance, reaction, severity) allergies in one transaction"""
+        verified_date = datetime.now().isoformat()
+        self._insert_many(self._INSERT_ALLERGY_SQL, [
+            (substance, reaction, severity.value, verified_date)
+            for substance, reaction, severity in rows
+        ])
     
     def add_medication(self, name: str, dosage: str, frequency: str, 
                       doctor: str, start_date: datetime, is_critical: bool = False):
         """Add current medication"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO medications 
-            (name, dosage, frequency, prescribing_doctor, start_date, is_critical)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (name, dosage, frequency, doctor, start_date.isoformat(), is_critical))
-        
-        conn.commit()
-        conn.close()
-        self._invalidate_qr_cache()
+        self.add_medications([(name, dosage, frequency, doctor, start_date, is_critical)])
+    
+    def add_medications(self, rows: List[tuple]):
+        """Add several (name, dosage, frequency, doctor, start_date[, is_critical]) medications at once"""
+        self._insert_many(self._INSERT_MEDICATION_SQL, [
+            (name, dosage, frequency, doctor, start_date.isoformat(), bool(is_critical and is_critical[0]))
+            for name, dosage, frequency, doctor, start_date, *is_critical in rows
+        ])
     
     def add_vital_metric(self, metric_type: str, value: str, unit: str, 
                         source: str, is_abnormal: bool = False):
         """Add vital sign measurement"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO vitals 
-            (metric_type, value, unit, recorded_date, source, is_abnormal)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (metric_type, value, unit, datetime.now().isoformat(), source, is_abnormal))
+        self.add_vital_metrics([(metric_type, value, unit, source, is_abnormal)])
+    
+    def add_vital_metrics(self, rows: List[tuple]):
+        """Add several (metric_type, value, unit, source[, is_abnormal]) measurements at once"""
+        now = datetime.now()
+        recorded_date, recorded_epoch = now.isoformat(), int(now.timestamp())
+        self._insert_many(self._INSERT_VITAL_SQL, [
+            (metric_type, value, unit, recorded_date, recorded_epoch, source, bool(is_abnormal and is_abnormal[0]))
+            for metric_type, value, unit, source, *is_abnormal in rows
+        ])
+    
+    def _insert_many(self, sql: str, rows: List[tuple]):
+        """executemany inside a single transaction, then one QR cache invalidation"""
+        if not rows:
+            return
+        
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany(sql, rows)
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
         
-        conn.commit()
-        conn.close()
         self._invalidate_qr_cache()
     
     def set_emergency_contact(self, name: str, relationship: str, phone: str, 
                             alternate_phone: str = None):
         """Set primary emergency contact"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO emergency_contact 
-            (id, name, relationship, phone, alternate_phone, is_primary)
-            VALUES (1, ?, ?, ?, ?, TRUE)
-        ''', (name, relationship, phone, alternate_phone))
+        with self._lock:
+            self._conn.execute('''
+                INSERT OR REPLACE INTO emergency_contact 
+                (id, name, relationship, phone, alternate_phone, is_primary)
+                VALUES (1, ?, ?, ?, ?, TRUE)
+            ''', (name, relationship, phone, alternate_phone))
         
-        conn.commit()
-        conn.close()
         self._invalidate_qr_cache()
     
     def generate_emergency_profile(self) -> EmergencyProfile:
         """Generate complete emergency profile from stored data"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get patient info
-        cursor.execute('SELECT * FROM patient_info WHERE id = 1')
-        patient_row = cursor.fetchone()
-        if not patient_row:
+        now = datetime.now()
+        week_ago = int((now - timedelta(days=7)).timestamp())
+        three_days_ago = int((now - timedelta(days=3)).timestamp())
+        
+        # Dispatch rows by their source-table tag, streamed in batches rather than one fetchall
+        grouped = {'p': [], 'a': [], 'm': [], 'c': [], 'v': []}
+        with self._lock:
+            cursor = self._conn.execute(self._SELECT_PROFILE_SQL, (week_ago, three_days_ago))
+            for batch in iter(lambda: cursor.fetchmany(128), []):
+                for tag, *columns in batch:
+                    grouped[tag].append(columns)
+        
+        if not grouped['p']:
             raise ValueError("Patient information not set. Please update patient info first.")
         
-        # Get allergies
-        cursor.execute('SELECT * FROM allergies')
-        allergy_rows = cursor.fetchall()
+        # Hoisted into locals for the row-building comprehensions
+        severity_of = _SEV_MAP
+        from_iso = datetime.fromisoformat
+        from_epoch = datetime.fromtimestamp
+        
         allergies = [
             Allergy(
-                substance=row[1],
-                reaction=row[2],
-                severity=SeverityLevel(row[3]),
-                verified_date=datetime.fromisoformat(row[4]) if row[4] else None
+                substance=substance,
+                reaction=reaction,
+                severity=severity_of[severity],
+                verified_date=from_iso(verified_date) if verified_date else None
             )
-            for row in allergy_rows
+            for substance, reaction, severity, verified_date, *_ in grouped['a']
         ]
         
-        # Get active medications
-        cursor.execute('SELECT * FROM medications WHERE is_active = TRUE')
-        med_rows = cursor.fetchall()
         medications = [
             Medication(
-                name=row[1],
-                dosage=row[2],
-                frequency=row[3],
-                prescribing_doctor=row[4],
-                start_date=datetime.fromisoformat(row[5]),
-                is_critical=bool(row[6]),
-                notes=row[8]
+                name=name,
+                dosage=dosage,
+                frequency=frequency,
+                prescribing_doctor=doctor,
+                start_date=from_iso(start_date),
+                is_critical=bool(is_critical),
+                notes=notes
             )
-            for row in med_rows
+            for name, dosage, frequency, doctor, start_date, is_critical, notes in grouped['m']
         ]
         
-        # Get emergency contact
-        cursor.execute('SELECT * FROM emergency_contact WHERE is_primary = TRUE')
-        contact_row = cursor.fetchone()
-        emergency_contact = EmergencyContact(
-            name=contact_row[1] if contact_row else "Not Set",
-            relationship=contact_row[2] if contact_row else "Unknown",
-            phone=contact_row[3] if contact_row else "Not Set",
-            alternate_phone=contact_row[4] if contact_row else None
-        )
+        if grouped['c']:
+            emergency_contact = EmergencyContact(*grouped['c'][0][:4])
+        else:
+            emergency_contact = EmergencyContact(name="Not Set", relationship="Unknown", phone="Not Set")
         
-        # Get recent vitals (last 7 days)
-        week_ago = (datetime.now() - timedelta(days=7)).isoformat()
-        cursor.execute('SELECT * FROM vitals WHERE recorded_date > ? ORDER BY recorded_date DESC', (week_ago,))
-        vital_rows = cursor.fetchall()
         recent_vitals = [
             VitalMetric(
-                metric_type=row[1],
-                value=row[2],
-                unit=row[3],
-                recorded_date=datetime.fromisoformat(row[4]),
-                source=row[5],
-                is_abnormal=bool(row[6])
+                metric_type=metric_type,
+                value=value,
+                unit=unit,
+                recorded_date=from_epoch(recorded_epoch),
+                source=source,
+                is_abnormal=bool(is_abnormal)
             )
-            for row in vital_rows
+            for metric_type, value, unit, recorded_epoch, source, is_abnormal, _ in grouped['v']
         ]
         
-        conn.close()
-        
         # Create emergency profile
+        name, dob, blood_type, gender, *_ = grouped['p'][0]
         profile = EmergencyProfile(
-            patient_name=patient_row[1],
-            date_of_birth=datetime.fromisoformat(patient_row[2]),
-            blood_type=BloodType(patient_row[3]),
-            gender=patient_row[4],
+            patient_name=name,
+            date_of_birth=from_iso(dob),
+            blood_type=_BLOOD_MAP[blood_type],
+            gender=gender,
             allergies=allergies,
             medications=medications,
             medical_conditions=[],  # TODO: Implement if needed
@@ -468,95 +784,94 @@ class EmergencyProfileManager:
         if profile is None:
             profile = self.generate_emergency_profile()
         
-        # Check if cached QR is still valid (less than 1 hour old)
-        if (self.qr_cache_path.exists() and 
-            datetime.fromtimestamp(self.qr_cache_path.stat().st_mtime) > 
-            datetime.now() - timedelta(hours=1)):
-            return str(self.qr_cache_path)
-        
-        # Create emergency data dict
-        emergency_data = profile.to_emergency_dict()
+        png = self._render_png_bytes(profile)
         
-        # Convert to JSON
-        json_data = json.dumps(emergency_data, separators=(',', ':'))  # Compact format
-        
-        # Create QR code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        
-        # Add header for medical QR codes
-        qr_content = f"MEDICAL_EMERGENCY:{json_data}"
-        qr.add_data(qr_content)
-        qr.make(fit=True)
-        
-        # Create QR image
-        qr_image = qr.make_image(fill_color="black", back_color="white")
-        
-        # Save QR code
-        qr_image.save(self.qr_cache_path)
+        # Cache hits return the same bytes object, so the file is only rewritten when the QR changed
+        if png is not self._qr_file_png:
+            self.qr_cache_path.write_bytes(png)
+            self._qr_file_png = png
         
         return str(self.qr_cache_path)
     
+    def _render_png_bytes(self, profile: EmergencyProfile) -> bytes:
+        """Render the emergency QR code as PNG bytes, reusing cached renders of identical data"""
+        json_bytes = _dumps_compact(profile.to_emergency_dict())
+        key = hashlib.blake2b(json_bytes, digest_size=16).digest()
+        
+        with self._lock:
+            png = self._qr_cache.get(key)
+            if png is not None:
+                self._qr_cache.move_to_end(key)
+                return png
+        
+        # Compress JSON for a smaller QR version
+        payload = _compress_payload(json_bytes)
+        
+        # Raw bytes keep the QR in byte mode; scanners decode with decode_emergency_payload
+        with io.BytesIO() as buf:
+            _save_qr_png(payload, buf)
+            png = buf.getvalue()
+        
+        with self._lock:
+            self._qr_cache[key] = png
+            if len(self._qr_cache) > self._QR_CACHE_SIZE:
+                self._qr_cache.popitem(last=False)
+        
+        return png
+    
     def get_qr_as_base64(self, profile: EmergencyProfile = None) -> str:
         """Get QR code as base64 string for display in app"""
-        qr_path = self.generate_emergency_qr(profile)
-        
-        with open(qr_path, 'rb') as f:
-            qr_bytes = f.read()
+        if profile is None:
+            profile = self.generate_emergency_profile()
         
-        return base64.b64encode(qr_bytes).decode('utf-8')
+        return base64.b64encode(self._render_png_bytes(profile)).decode('utf-8')
     
     def _invalidate_qr_cache(self):
-        """Remove cached QR code when data changes"""
-        if self.qr_cache_path.exists():
-            self.qr_cache_path.unlink()
+        """Drop cached QR renders when data changes"""
+        with self._lock:
+            self._qr_cache.clear()
     
     def export_emergency_profile_text(self, profile: EmergencyProfile = None) -> str:
         """Export emergency profile as readable text (backup method)"""
         if profile is None:
             profile = self.generate_emergency_profile()
         
-        text_lines = [
-            "=== EMERGENCY MEDICAL INFORMATION ===",
-            f"Patient: {profile.patient_name}",
-            f"DOB: {profile.date_of_birth.strftime('%Y-%m-%d')} (Age: {profile._calculate_age()})",
-            f"Blood Type: {profile.blood_type.value}",
-            f"Gender: {profile.gender}",
-            "",
-            "CRITICAL ALLERGIES:",
-        ]
+        contact = profile.emergency_contact
+        buf = io.StringIO()
+        w = buf.write
+        
+        w(_TEXT_EXPORT_HEADER.format(
+            name=profile.patient_name,
+            dob=profile.date_of_birth.strftime('%Y-%m-%d'),
+            age=profile._calculate_age(),
+            blood_type=profile.blood_type.value,
+            gender=profile.gender,
+        ))
         
         critical_allergies = [a for a in profile.allergies if a.severity == SeverityLevel.CRITICAL]
         if critical_allergies:
             for allergy in critical_allergies:
-                text_lines.append(f"  - {allergy.substance}: {allergy.reaction}")
+                w(f"  - {allergy.substance}: {allergy.reaction}\n")
         else:
-            text_lines.append("  None reported")
+            w("  None reported\n")
         
-        text_lines.extend([
-            "",
-            "CURRENT MEDICATIONS:",
-        ])
+        w("\nCURRENT MEDICATIONS:\n")
         
         if profile.medications:
             for med in profile.medications:
                 critical_flag = " [CRITICAL]" if med.is_critical else ""
-                text_lines.append(f"  - {med.name} {med.dosage} {med.frequency}{critical_flag}")
+                w(f"  - {med.name} {med.dosage} {med.frequency}{critical_flag}\n")
         else:
-            text_lines.append("  None reported")
+            w("  None reported\n")
         
-        text_lines.extend([
-            "",
-            f"Emergency Contact: {profile.emergency_contact.name} ({profile.emergency_contact.relationship})",
-            f"Phone: {profile.emergency_contact.phone}",
-            f"Updated: {profile.last_updated.strftime('%Y-%m-%d %H:%M')}"
-        ])
+        w(_TEXT_EXPORT_FOOTER.format(
+            contact_name=contact.name,
+            relationship=contact.relationship,
+            phone=contact.phone,
+            updated=profile.last_updated.strftime('%Y-%m-%d %H:%M'),
+        ))
         
-        return "\n".join(text_lines)
+        return buf.getvalue()
 
 
 # Integration with existing camera component
@@ -618,17 +933,23 @@ async def test_emergency_system():
     )
     
     # Add critical medical info
-    manager.add_allergy("Shellfish", "Anaphylaxis", SeverityLevel.CRITICAL)
-    manager.add_allergy("Latex", "Contact dermatitis", SeverityLevel.MODERATE)
+    manager.add_allergies([
+        ("Shellfish", "Anaphylaxis", SeverityLevel.CRITICAL),
+        ("Latex", "Contact dermatitis", SeverityLevel.MODERATE),
+    ])
     
-    manager.add_medication("Insulin", "10 units", "Before meals", "Dr. Johnson", datetime(2024, 1, 1), True)
-    manager.add_medication("Lisinopril", "10mg", "Once daily", "Dr. Johnson", datetime(2024, 2, 1))
+    manager.add_medications([
+        ("Insulin", "10 units", "Before meals", "Dr. Johnson", datetime(2024, 1, 1), True),
+        ("Lisinopril", "10mg", "Once daily", "Dr. Johnson", datetime(2024, 2, 1)),
+    ])
     
     manager.set_emergency_contact("John Smith", "Husband", "+1-555-987-6543", "+1-555-111-2222")
     
     # Add some vital signs
-    manager.add_vital_metric("glucose", "180", "mg/dL", "home_monitor", True)
-    manager.add_vital_metric("blood_pressure", "140/90", "mmHg", "home_monitor", True)
+    manager.add_vital_metrics([
+        ("glucose", "180", "mg/dL", "home_monitor", True),
+        ("blood_pressure", "140/90", "mmHg", "home_monitor", True),
+    ])
     
     # Generate emergency profile
     profile = manager.generate_emergency_profile()
@@ -0,0 +1,49 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import cv2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.camera_component import CameraConfig, DocumentCamera, DocumentType, StorageError
+
+
+class ImportFromFilesFailureTest(unittest.TestCase):
+    """A failing batch import must not leave unsaved patient images behind"""
+    
+    def setUp(self):
+        self.inputs = tempfile.mkdtemp()
+        self.save_directory = tempfile.mkdtemp()
+        self.camera = DocumentCamera(CameraConfig(save_directory=self.save_directory))
+    
+    def tearDown(self):
+        self.camera.close()
+    
+    def _image_files(self):
+        found = []
+        for root, _, files in os.walk(self.save_directory):
+            found.extend(
+                os.path.join(root, name) for name in files
+                if not name.endswith(('.db', '.db-wal', '.db-shm', '.log'))
+            )
+        return found
+    
+    def test_bad_file_discards_earlier_images(self):
+        good = os.path.join(self.inputs, 'small.png')
+        cv2.imwrite(good, np.full((64, 64, 3), 200, np.uint8))
+        bad = os.path.join(self.inputs, 'bad.jpg')
+        with open(bad, 'wb') as f:
+            f.write(b'\xff\xd8\xffgarbage')
+        
+        with self.assertRaises(StorageError):
+            asyncio.run(self.camera.import_from_files([good, bad], DocumentType.OTHER))
+        
+        self.assertEqual(self._image_files(), [])
+        self.assertEqual(self.camera.get_all_documents(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
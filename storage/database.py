@@ -1,26 +1,20 @@
 import sqlite3
 from pathlib import Path
 
-def init_db():
-    db_path = Path("data/database.db")
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Patient Profile Table
-    cursor.execute('''
+DB_PATH = Path("data/database.db")
+
+# Full schema, run as one script so SQLite parses it in a single call
+SCHEMA_SQL = '''
+    -- Patient Profile Table
     CREATE TABLE IF NOT EXISTS patient_profiles (
         id INTEGER PRIMARY KEY,
         name TEXT NOT NULL,
         dob DATE NOT NULL,
         blood_type TEXT,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-    
-    # Documents Table
-    cursor.execute('''
+    );
+
+    -- Documents Table
     CREATE TABLE IF NOT EXISTS documents (
         id INTEGER PRIMARY KEY,
         filename TEXT NOT NULL,
@@ -29,11 +23,9 @@ def init_db():
         ocr_text TEXT,
         patient_id INTEGER,
         FOREIGN KEY (patient_id) REFERENCES patient_profiles (id)
-    )
-    ''')
-    
-    # Medications Table
-    cursor.execute('''
+    );
+
+    -- Medications Table
     CREATE TABLE IF NOT EXISTS medications (
         id INTEGER PRIMARY KEY,
         name TEXT NOT NULL,
@@ -42,8 +34,15 @@ def init_db():
         patient_id INTEGER,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY (patient_id) REFERENCES patient_profiles (id)
-    )
-    ''')
+    );
+'''
+
+def init_db():
+    """Create the app tables in DB_PATH"""
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.executescript(SCHEMA_SQL)
+    finally:
+        conn.close()